@@ -0,0 +1,33 @@
+import threading
+
+# In-process memo for dashboard aggregates. get() runs the loader only when the named value
+# is missing; mutations call invalidate() with the names they affect. A value that was being
+# loaded while its name was invalidated is returned but not kept, so the cache never holds
+# a result older than the last invalidation.
+
+class AggregateCache:
+    def __init__(self):
+        self.values = {}
+        self.versions = {}      # {name: number of invalidations so far}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, load):
+        with self.lock:
+            if name in self.values:
+                self.hits += 1
+                return self.values[name]
+            self.misses += 1
+            version = self.versions.get(name, 0)
+        value = load()
+        with self.lock:
+            if self.versions.get(name, 0) == version:
+                self.values[name] = value
+        return value
+
+    def invalidate(self, *names):
+        with self.lock:
+            for name in names:
+                self.values.pop(name, None)
+                self.versions[name] = self.versions.get(name, 0) + 1
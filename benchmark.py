@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from data_base_csv import ItemManagerCSV
+from data_base_fast import DataManager
+from data_base_json import ItemManagerJSON
+from data_base_msgpack import ItemManagerMsgPack
+from data_base_repos import Item as RepoItem, ItemRepository
+
+# مقایسه‌ی همه‌ی پشتیبان‌های ذخیره‌سازی با یک بار کاری یکسان:
+#   python benchmark.py --sizes 1000 100000 1000000 --json results.json
+
+PHASES = ('create', 'read', 'update', 'delete', 'search')
+
+
+def item_name(i):
+    return f'کالا {i}'
+
+
+# ------------------- آداپتورهای پشتیبان‌ها -------------------
+# هر آداپتور داده‌ی اولیه را یک‌جا می‌نویسد (بیرون از زمان‌سنجی) و عملیات تکی را با API خود پشتیبان انجام می‌دهد.
+
+class CSVBackend:
+    files = ('items.csv',)
+
+    def __init__(self, directory):
+        self.filename = os.path.join(directory, 'items.csv')
+
+    def fill(self, count):
+        manager = ItemManagerCSV(self.filename)
+        manager.items = [{'id': str(i), 'name': item_name(i), 'buy_price': str(i), 'sell_price': str(i * 2),
+                          'quantity': '5'} for i in range(count)]
+        manager.save()
+
+    def open(self):
+        self.manager = ItemManagerCSV(self.filename)
+
+    def create(self, i):
+        self.manager.create_item(str(i), item_name(i), i, i * 2, 5)
+
+    def read(self, i):
+        return self.manager.read_item(str(i))
+
+    def update(self, i):
+        self.manager.update_item(str(i), quantity=10)
+
+    def delete(self, i):
+        self.manager.delete_item(str(i))
+
+    def search(self, text):
+        # این پشتیبان جستجو ندارد؛ پیمایش خطی همان کاری است که فراخواننده انجام می‌دهد
+        return [item for item in self.manager.items if text in item['name']]
+
+    def close(self):
+        pass
+
+
+class JSONBackend(CSVBackend):
+    files = ('items.json',)
+    manager_class = ItemManagerJSON
+
+    def __init__(self, directory):
+        self.filename = os.path.join(directory, self.files[0])
+
+    def fill(self, count):
+        manager = self.manager_class(self.filename)
+        manager.items = {str(i): {'id': str(i), 'name': item_name(i), 'buy_price': i, 'sell_price': i * 2,
+                                  'quantity': 5} for i in range(count)}
+        manager.save()
+
+    def open(self):
+        self.manager = self.manager_class(self.filename)
+
+    def search(self, text):
+        return [item for item in self.manager.items.values() if text in item['name']]
+
+
+class MsgPackBackend(JSONBackend):
+    files = ('items.dat',)
+    manager_class = ItemManagerMsgPack
+
+
+class RepositoryBackend(JSONBackend):
+    files = ('items.json',)
+    manager_class = ItemRepository
+
+    def fill(self, count):
+        repo = ItemRepository(self.filename)
+        repo.items = {str(i): RepoItem(str(i), item_name(i), i, i * 2, 5) for i in range(count)}
+        repo.save()
+
+    def create(self, i):
+        self.manager.add_item(RepoItem(str(i), item_name(i), i, i * 2, 5))
+
+    def read(self, i):
+        return self.manager.get_item(str(i))
+
+    def search(self, text):
+        return [item for item in self.manager.items.values() if text in item.name]
+
+
+class DataManagerBackend:
+    files = ('items.dat', 'sales.dat', 'changes.log')
+
+    def __init__(self, directory):
+        self.paths = [os.path.join(directory, name) for name in self.files]
+
+    def _manager(self):
+        return DataManager(*self.paths)
+
+    def fill(self, count):
+        manager = self._manager()
+        with manager.batch():
+            for i in range(count):
+                manager.create_item(i, item_name(i), i, i * 2, 5)
+        manager.checkpoint()
+        manager.close()
+
+    def open(self):
+        self.manager = self._manager()
+
+    def create(self, i):
+        self.manager.create_item(i, item_name(i), i, i * 2, 5)
+
+    def read(self, i):
+        return self.manager.read_item_by_id(i)
+
+    def update(self, i):
+        self.manager.update_item(i, quantity=10)
+
+    def delete(self, i):
+        self.manager.delete_item(i)
+
+    def search(self, text):
+        return self.manager.search_items_by_name(text)
+
+    def close(self):
+        self.manager.close()
+
+
+class SQLiteBackend:
+    files = ('items.db',)
+
+    def __init__(self, directory):
+        self.filename = os.path.join(directory, 'items.db')
+
+    def fill(self, count):
+        # همان جدول test_sql.py
+        conn = sqlite3.connect(self.filename)
+        conn.execute('''
+            CREATE TABLE items (
+                id INTEGER PRIMARY KEY,
+                name TEXT,
+                buy_price REAL,
+                sell_price REAL,
+                quantity INTEGER
+            )
+        ''')
+        conn.executemany('INSERT INTO items VALUES (?, ?, ?, ?, ?)',
+                         ((i, item_name(i), i, i * 2, 5) for i in range(count)))
+        conn.commit()
+        conn.close()
+
+    def open(self):
+        self.conn = sqlite3.connect(self.filename)
+
+    def create(self, i):
+        self.conn.execute('INSERT INTO items VALUES (?, ?, ?, ?, ?)', (i, item_name(i), i, i * 2, 5))
+        self.conn.commit()
+
+    def read(self, i):
+        return self.conn.execute('SELECT * FROM items WHERE id=?', (i,)).fetchone()
+
+    def update(self, i):
+        self.conn.execute('UPDATE items SET quantity=? WHERE id=?', (10, i))
+        self.conn.commit()
+
+    def delete(self, i):
+        self.conn.execute('DELETE FROM items WHERE id=?', (i,))
+        self.conn.commit()
+
+    def search(self, text):
+        return self.conn.execute('SELECT * FROM items WHERE name LIKE ?', ('%' + text + '%',)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+BACKENDS = {
+    'csv': CSVBackend,
+    'json': JSONBackend,
+    'msgpack': MsgPackBackend,
+    'repository': RepositoryBackend,
+    'datamanager': DataManagerBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+# ------------------- اجرای بار کاری -------------------
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def time_phase(operation, keys, max_seconds):
+    # اجرای عملیات روی کلیدها تا پایان کلیدها یا سقف زمانی؛ پشتیبان‌هایی که هر تغییر را
+    # با بازنویسی کل فایل ذخیره می‌کنند در اندازه‌های بزرگ فقط چند عملیات انجام می‌دهند.
+    latencies = []
+    start = time.perf_counter()
+    for key in keys:
+        t0 = time.perf_counter()
+        operation(key)
+        latencies.append(time.perf_counter() - t0)
+        if time.perf_counter() - start >= max_seconds:
+            break
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'ops': len(latencies),
+        'ops_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def run_backend(name, size, ops, max_seconds, seed=0):
+    directory = tempfile.mkdtemp(prefix=f'bench-{name}-')
+    try:
+        backend = BACKENDS[name](directory)
+        backend.fill(size)
+        # حافظه‌ی اوج هنگام باز کردن داده‌ها از دیسک (tracemalloc فقط حافظه‌ی پایتون را می‌بیند، نه کش SQLite)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        backend.open()
+        load_seconds = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        rng = random.Random(seed)
+        existing = [rng.randrange(size) for _ in range(ops)] if size else []
+        new_keys = list(range(size, size + ops))
+        results = {
+            'create': time_phase(backend.create, new_keys, max_seconds),
+            'read': time_phase(backend.read, existing, max_seconds),
+            'update': time_phase(backend.update, existing, max_seconds),
+        }
+        created = new_keys[:results['create']['ops']]
+        results['delete'] = time_phase(backend.delete, created, max_seconds)
+        queries = [item_name(rng.randrange(max(size, 1)))[-3:] for _ in range(max(1, ops // 10))]
+        results['search'] = time_phase(backend.search, queries, max_seconds)
+        backend.close()
+
+        file_size = sum(os.path.getsize(path) for path in
+                        (os.path.join(directory, f) for f in backend.files) if os.path.exists(path))
+        return {
+            'backend': name,
+            'size': size,
+            'load_seconds': load_seconds,
+            'file_bytes': file_size,
+            'peak_memory_bytes': peak,
+            'phases': results,
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def format_table(results):
+    header = f"{'backend':<12} {'size':>9} {'phase':<7} {'ops':>6} {'ops/sec':>11} {'p50 ms':>9} " \
+             f"{'p99 ms':>9} {'file MiB':>9} {'peak MiB':>9} {'load s':>8}"
+    lines = [header, '-' * len(header)]
+    for result in results:
+        for phase in PHASES:
+            stats = result['phases'][phase]
+            lines.append(f"{result['backend']:<12} {result['size']:>9,} {phase:<7} {stats['ops']:>6} "
+                         f"{stats['ops_per_sec']:>11,.0f} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+                         f"{result['file_bytes'] / 2 ** 20:>9.2f} {result['peak_memory_bytes'] / 2 ** 20:>9.1f} "
+                         f"{result['load_seconds']:>8.3f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='مقایسه‌ی کارایی پشتیبان‌های ذخیره‌سازی کالا')
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=list(BACKENDS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 100000, 1000000])
+    parser.add_argument('--ops', type=int, default=200, help='تعداد عملیات در هر مرحله')
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='سقف زمان هر مرحله')
+    parser.add_argument('--json', help='مسیر فایل خروجی JSON')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for name in args.backends:
+            results.append(run_backend(name, size, args.ops, args.max_seconds))
+    print(format_table(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+    return results
+
+
+if __name__ == '__main__':
+    main()
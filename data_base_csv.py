@@ -1,26 +1,112 @@
 import csv
 import os
 
+FIELDNAMES = ['id', 'name', 'buy_price', 'sell_price', 'quantity']
+
 class ItemManagerCSV:
-    def __init__(self, filename='items.csv'):
+    def __init__(self, filename='items.csv', compact_threshold=10000):
         self.filename = filename
-        self.items = []
+        self.journal_filename = os.path.splitext(filename)[0] + '.changes.csv'
+        self.compact_threshold = compact_threshold
+        self.rows = {}          # {id: row}, in file order
+        self.fieldnames = list(FIELDNAMES)
+        self.journal_size = 0
+        self.journal_ids = set()
         self.load()
 
     def load(self):
+        # Rows are written in the file's own column order (e.g. an ERP export), and columns
+        # this class does not know about are kept.
+        self.rows = {}
+        self.fieldnames = list(FIELDNAMES)
         if os.path.exists(self.filename):
             with open(self.filename, 'r', newline='', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
-                self.items = list(reader)
-        else:
-            self.items = []
+                for row in reader:
+                    self._put(row)
+                if reader.fieldnames:
+                    self.fieldnames = list(reader.fieldnames)
+        self.journal_size = 0
+        self.journal_ids = set()
+        journal_fieldnames = None
+        if os.path.exists(self.journal_filename):
+            with open(self.journal_filename, 'r', newline='', encoding='utf-8') as csvfile:
+                reader = csv.DictReader(csvfile)
+                for row in reader:
+                    op = row.pop('op')
+                    if op == 'put':
+                        self._put(row)
+                    elif op == 'del':
+                        self._remove(row['id'])
+                    self.journal_ids.add(row['id'])
+                    self.journal_size += 1
+                journal_fieldnames = reader.fieldnames
+        if journal_fieldnames not in (None, ['op'] + self.fieldnames):
+            # The journal was written with other columns; fold it in under one header.
+            self._add_fields(dict.fromkeys(name for name in journal_fieldnames if name != 'op'))
+            self.save()
 
     def save(self):
-        with open(self.filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['id', 'name', 'buy_price', 'sell_price', 'quantity']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
             writer.writeheader()
-            writer.writerows(self.items)
+            writer.writerows(self.rows.values())
+        os.replace(tmp_filename, self.filename)
+        if os.path.exists(self.journal_filename):
+            os.remove(self.journal_filename)
+        self.journal_size = 0
+        self.journal_ids = set()
+
+    # Folds the journal of updates and deletes back into the main CSV file.
+    compact = save
+
+    def _add_fields(self, *rows):
+        # Adds the columns of rows that the file does not have yet; True if there were any.
+        fieldnames = set(self.fieldnames)
+        missing = [key for row in rows for key in row if key not in fieldnames]
+        for key in missing:
+            if key not in fieldnames:
+                fieldnames.add(key)
+                self.fieldnames.append(key)
+        return bool(missing)
+
+    @property
+    def items(self):
+        # A copy of the rows in file order; use read_item for lookups.
+        return list(self.rows.values())
+
+    @items.setter
+    def items(self, items):
+        self.rows = {row['id']: row for row in items}
+
+    def _put(self, row):
+        # Replacing a row keeps its position, so compaction keeps the file's row order.
+        self.rows[row['id']] = row
+
+    def _remove(self, item_id):
+        return self.rows.pop(item_id, None)
+
+    def _append(self, filename, fieldnames, row):
+        exists = os.path.exists(filename) and os.path.getsize(filename) > 0
+        if exists:
+            with open(filename, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                missing_newline = f.read(1) not in (b'\n', b'\r')
+        with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+            if exists and missing_newline:
+                csvfile.write('\r\n')
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            if not exists:
+                writer.writeheader()
+            writer.writerow(row)
+
+    def _journal(self, op, row):
+        self._append(self.journal_filename, ['op'] + self.fieldnames, dict(row, op=op))
+        self.journal_ids.add(row['id'])
+        self.journal_size += 1
+        if self.journal_size >= self.compact_threshold:
+            self.compact()
 
     def create_item(self, item_id, name, buy_price, sell_price, quantity):
         item = {
@@ -30,35 +116,43 @@ class ItemManagerCSV:
             'sell_price': str(sell_price),
             'quantity': str(quantity)
         }
-        self.items.append(item)
-        self.save()
+        self._put(item)
+        if self._add_fields(item):
+            # A new column cannot be appended under the existing header.
+            self.save()
+        elif item_id in self.journal_ids:
+            # The journal is replayed after the main file, so it has to record this
+            # row too or an earlier tombstone for the same id would win on load.
+            self._journal('put', item)
+        else:
+            self._append(self.filename, self.fieldnames, item)
 
     def read_item(self, item_id):
-        for item in self.items:
-            if item['id'] == item_id:
-                return item
-        return None
+        return self.rows.get(item_id)
 
     def update_item(self, item_id, **kwargs):
-        for item in self.items:
-            if item['id'] == item_id:
-                item.update({k: str(v) for k, v in kwargs.items()})
-                self.save()
-                return True
-        return False
+        item = self.read_item(item_id)
+        if item is None:
+            return False
+        item.update({k: str(v) for k, v in kwargs.items()})
+        if self._add_fields(item):
+            self.save()
+        else:
+            self._journal('put', item)
+        return True
 
     def delete_item(self, item_id):
-        for i, item in enumerate(self.items):
-            if item['id'] == item_id:
-                del self.items[i]
-                self.save()
-                return True
-        return False
-
-# مثال استفاده:
-manager_csv = ItemManagerCSV()
-manager_csv.create_item('1', 'Laptop', 1000, 1200, 10)
-item = manager_csv.read_item('1')
-print(item)
-manager_csv.update_item('1', quantity=15)
-manager_csv.delete_item('1')
+        item = self._remove(item_id)
+        if item is None:
+            return False
+        self._journal('del', {'id': item_id})
+        return True
+
+if __name__ == '__main__':
+    # مثال استفاده:
+    manager_csv = ItemManagerCSV()
+    manager_csv.create_item('1', 'Laptop', 1000, 1200, 10)
+    item = manager_csv.read_item('1')
+    print(item)
+    manager_csv.update_item('1', quantity=15)
+    manager_csv.delete_item('1')
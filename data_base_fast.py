@@ -1,9 +1,20 @@
+import bisect
+import copy
 import msgpack
 import os
+import shutil
+import struct
 import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from name_normalization import normalize_name
 
 # تعریف کلاس Item برای نگهداری اطلاعات کالا
 class Item:
+    __slots__ = ('id', 'name', 'buy_price', 'sell_price', 'quantity')  # بدون __dict__ برای صرفه‌جویی در حافظه
+
     def __init__(self, item_id, name, buy_price, sell_price, quantity):
         self.id = item_id                # شناسه کالا
         self.name = name                 # نام کالا
@@ -21,14 +32,22 @@ class Item:
             'quantity': self.quantity
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        # ساخت شیء از دیکشنری سریال‌شده
+        return cls(data['id'], data['name'], data['buy_price'], data['sell_price'], data['quantity'])
+
 # تعریف کلاس Sale برای نگهداری اطلاعات فروش
 class Sale:
-    def __init__(self, sale_id, item_id, quantity, client, date):
+    __slots__ = ('id', 'item_id', 'quantity', 'client', 'date', 'price')  # بدون __dict__ برای صرفه‌جویی در حافظه
+
+    def __init__(self, sale_id, item_id, quantity, client, date, price=None):
         self.id = sale_id                # شناسه فروش
         self.item_id = item_id           # شناسه کالا
         self.quantity = quantity         # تعداد فروش رفته
         self.client = client             # نام مشتری
         self.date = date                 # تاریخ فروش
+        self.price = price               # قیمت واحد در زمان فروش (None برای داده‌های قدیمی)
 
     def to_dict(self):
         # تبدیل شیء به دیکشنری برای سریال‌سازی
@@ -37,65 +56,763 @@ class Sale:
             'item_id': self.item_id,
             'quantity': self.quantity,
             'client': self.client,
-            'date': self.date
+            'date': self.date,
+            'price': self.price
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        # ساخت شیء از دیکشنری سریال‌شده
+        return cls(data['id'], data['item_id'], data['quantity'], data['client'], data['date'],
+                   data.get('price'))
+
+# سرآیند فایل اسنپ‌شات: نشانه، crc32 و طول داده‌ها
+SNAPSHOT_MAGIC = b'DMS1'
+SNAPSHOT_HEADER = struct.Struct('>4sIQ')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+# خواننده‌ای که هنگام خواندن، crc32 و طول داده‌ها را محاسبه می‌کند
+class ChecksumReader:
+    def __init__(self, f, limit):
+        self.f = f
+        self.limit = limit      # بیشتر از طول ثبت‌شده در سرآیند خوانده نمی‌شود
+        self.length = 0
+        self.checksum = 0
+
+    def read(self, size=-1):
+        remaining = self.limit - self.length
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.f.read(size)
+        self.length += len(data)
+        self.checksum = zlib.crc32(data, self.checksum)
+        return data
+
+    def read_rest(self):
+        while self.read(1024 * 1024):
+            pass
+
+
+# fsync پوشه پس از os.replace تا تغییر نام هم پایدار شود (در ویندوز پشتیبانی نمی‌شود)
+def fsync_directory(filename):
+    if os.name != 'posix':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# خواندن تدریجی رکوردهای یک فایل اسنپ‌شات بدون نگه‌داشتن کل فایل یا کل لیست در حافظه
+# checksum هم‌زمان با خواندن محاسبه و در پایان بررسی می‌شود
+def iter_snapshot(filename):
+    if not os.path.exists(filename):
+        return
+    with open(filename, 'rb') as f:
+        header = f.read(SNAPSHOT_HEADER.size)
+        if header[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            # اسنپ‌شات قدیمی بدون سرآیند
+            f.seek(0)
+            unpacker = msgpack.Unpacker(f, raw=False)
+            for _ in range(unpacker.read_array_header()):
+                yield unpacker.unpack()
+            return
+        _, checksum, length = SNAPSHOT_HEADER.unpack(header)
+        reader = ChecksumReader(f, length)
+        unpacker = msgpack.Unpacker(reader, raw=False)
+        try:
+            for _ in range(unpacker.read_array_header()):
+                yield unpacker.unpack()
+        except (ValueError, msgpack.UnpackException) as e:
+            raise SnapshotError(f'اسنپ‌شات خراب است: {filename}') from e
+        reader.read_rest()
+        if reader.length != length or reader.checksum != checksum:
+            raise SnapshotError(f'checksum اسنپ‌شات نادرست است: {filename}')
+
+
+# ایندکس سه‌حرفی (trigram) روی نام‌های یکسان‌سازی‌شده برای جستجوی زیررشته و پیشوند
+class TrigramIndex:
+    def __init__(self):
+        self.names = {}     # {item_id: ' ' + نام یکسان‌سازی‌شده}
+        self.grams = {}     # {trigram: set(item_id)}
+        self.lock = threading.Lock()  # فقط نویسنده‌ها قفل می‌گیرند
+
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, item_id, name):
+        # فاصله‌ی ابتدایی باعث می‌شود پیشوند کلمه‌ی اول هم مانند بقیه‌ی کلمات ایندکس شود
+        text = ' ' + normalize_name(name)
+        with self.lock:
+            self._remove(item_id)
+            self.names[item_id] = text
+            for gram in self._trigrams(text):
+                self.grams.setdefault(gram, set()).add(item_id)
+
+    def remove(self, item_id):
+        with self.lock:
+            self._remove(item_id)
+
+    def _remove(self, item_id):
+        text = self.names.pop(item_id, None)
+        if text is None:
+            return
+        for gram in self._trigrams(text):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self.grams[gram]
+
+    # mode='substring': هر جای نام؛ mode='prefix': ابتدای یکی از کلمات نام
+    def search(self, query, mode='substring', limit=None):
+        query = normalize_name(query)
+        if mode == 'prefix':
+            query = ' ' + query
+        elif mode != 'substring':
+            raise ValueError(f'حالت جستجوی نامعتبر: {mode}')
+        if len(query) < 3:
+            # پرس‌وجوی کوتاه‌تر از یک trigram؛ پیمایش نام‌های از پیش یکسان‌سازی‌شده
+            candidates = list(self.names)
+        else:
+            postings = []
+            for gram in self._trigrams(query):
+                ids = self.grams.get(gram)
+                if not ids:
+                    return []
+                postings.append(ids)
+            postings.sort(key=len)
+            # کپی و اشتراک مجموعه‌ها در C انجام می‌شود و با نوشتن همزمان تداخل ندارد
+            candidates = set(postings[0])
+            for ids in postings[1:]:
+                candidates.intersection_update(ids)
+        matches = []
+        for item_id in candidates:
+            text = self.names.get(item_id)
+            if text is not None and query in text:
+                matches.append((not text.startswith(query, 1 if mode == 'substring' else 0),
+                                len(text), text, item_id))
+        # ابتدا نام‌هایی که با عبارت شروع می‌شوند، سپس نام‌های کوتاه‌تر
+        matches.sort(key=lambda match: match[:3])
+        if limit is not None:
+            matches = matches[:limit]
+        return [match[3] for match in matches]
+
+
+# ایندکس‌های ثانویه‌ی فروش (کالا، مشتری، تاریخ) و جمع‌های تعداد و درآمد که با هر تغییر به‌روز می‌شوند
+class SalesIndex:
+    def __init__(self):
+        self.by_item = {}       # {item_id: set(sale_id)}
+        self.by_client = {}     # {client: set(sale_id)}
+        self.by_date = {}       # {date: set(sale_id)}
+        self.dates = []         # تاریخ‌های مرتب برای جستجوی بازه‌ای
+        self.totals = {'item': {}, 'client': {}, 'date': {}}  # {نوع: {کلید: (تعداد، درآمد)}}
+        self.entries = {}       # {sale_id: (item_id, client, date, تعداد، درآمد)} برای حذف دقیق
+        self.unpriced = set()   # فروش‌هایی که قیمتشان نامعلوم است و درآمدشان در جمع‌ها نیست
+        self.lock = threading.Lock()  # فقط نویسنده‌ها قفل می‌گیرند
+
+    def add(self, sale, price):
+        # فروشی با قیمت نامعلوم (None) در جمع درآمد حساب نمی‌شود و در unpriced می‌ماند
+        entry = (sale.item_id, sale.client, sale.date, sale.quantity, 0 if price is None else sale.quantity * price)
+        with self.lock:
+            self._remove(sale.id)
+            if price is None:
+                self.unpriced.add(sale.id)
+            self.entries[sale.id] = entry
+            item_id, client, date, units, revenue = entry
+            self.by_item.setdefault(item_id, set()).add(sale.id)
+            self.by_client.setdefault(client, set()).add(sale.id)
+            if date not in self.by_date:
+                self.by_date[date] = set()
+                bisect.insort(self.dates, date)
+            self.by_date[date].add(sale.id)
+            for kind, key in (('item', item_id), ('client', client), ('date', date)):
+                old_units, old_revenue = self.totals[kind].get(key, (0, 0))
+                # جایگزینی تاپل (نه تغییر درجا) تا خواننده‌ها مقدار نیمه‌کاره نبینند
+                self.totals[kind][key] = (old_units + units, old_revenue + revenue)
+
+    def remove(self, sale_id):
+        with self.lock:
+            self._remove(sale_id)
+
+    def _remove(self, sale_id):
+        entry = self.entries.pop(sale_id, None)
+        if entry is None:
+            return
+        self.unpriced.discard(sale_id)
+        item_id, client, date, units, revenue = entry
+        for index, key in ((self.by_item, item_id), (self.by_client, client), (self.by_date, date)):
+            ids = index[key]
+            ids.discard(sale_id)
+            if not ids:
+                del index[key]
+                if index is self.by_date:
+                    del self.dates[bisect.bisect_left(self.dates, date)]
+        for kind, key in (('item', item_id), ('client', client), ('date', date)):
+            old_units, old_revenue = self.totals[kind][key]
+            if old_units == units and key not in getattr(self, 'by_' + kind):
+                del self.totals[kind][key]
+            else:
+                self.totals[kind][key] = (old_units - units, old_revenue - revenue)
+
+    def sale_ids(self, kind, key):
+        return set(getattr(self, 'by_' + kind).get(key, ()))
+
+    def sale_ids_between(self, start, end):
+        ids = set()
+        dates = self.dates[:]   # کپی اتمیک
+        for date in dates[bisect.bisect_left(dates, start):bisect.bisect_right(dates, end)]:
+            ids.update(self.by_date.get(date, ()))
+        return ids
+
+
+# قفل اشتراکی/انحصاری: نویسنده‌های عادی به صورت اشتراکی و batch و checkpoint به صورت انحصاری وارد می‌شوند
+class SharedLock:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.shared_count = 0       # تعداد نگه‌دارنده‌های اشتراکی
+        self.owner = None           # نخ دارنده‌ی قفل انحصاری
+        self.depth = 0              # عمق ورود مجدد نخ دارنده‌ی قفل انحصاری
+        self.waiting_exclusive = 0  # نخ‌های منتظر قفل انحصاری (اولویت با آن‌هاست)
+
+    def acquire_shared(self):
+        me = threading.get_ident()
+        with self.cond:
+            if self.owner == me:
+                self.depth += 1  # نخ دارنده‌ی قفل انحصاری مجاز به ورود است
+                return
+            while self.owner is not None or self.waiting_exclusive:
+                self.cond.wait()
+            self.shared_count += 1
+
+    def release_shared(self):
+        with self.cond:
+            if self.owner == threading.get_ident():
+                self.depth -= 1
+                return
+            self.shared_count -= 1
+            if not self.shared_count:
+                self.cond.notify_all()
+
+    def acquire(self):
+        me = threading.get_ident()
+        with self.cond:
+            if self.owner == me:
+                self.depth += 1
+                return True
+            self.waiting_exclusive += 1
+            while self.owner is not None or self.shared_count:
+                self.cond.wait()
+            self.waiting_exclusive -= 1
+            self.owner = me
+            self.depth = 1
+            return True
+
+    def release(self):
+        with self.cond:
+            self.depth -= 1
+            if not self.depth:
+                self.owner = None
+                self.cond.notify_all()
+
+    @contextmanager
+    def shared(self):
+        self.acquire_shared()
+        try:
+            yield
+        finally:
+            self.release_shared()
+
+    # استفاده با with به معنی قفل انحصاری است
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
 # تعریف کلاس DataManager برای مدیریت داده‌ها
 class DataManager:
-    def __init__(self, items_filename='items.dat', sales_filename='sales.dat'):
+    def __init__(self, items_filename='items.dat', sales_filename='sales.dat',
+                 log_filename='changes.log', max_log_size=64 * 1024 * 1024, sync=True,
+                 group_commit=False, async_persist=False, flush_interval=1.0, flush_threshold=1000,
+                 lazy_sales=False, compact_interval=None):
         self.items_filename = items_filename    # نام فایل ذخیره‌سازی کالاها
         self.sales_filename = sales_filename    # نام فایل ذخیره‌سازی فروش‌ها
+        self.log_filename = log_filename        # نام فایل لاگ تغییرات (فقط افزودنی)
+        self.max_log_size = max_log_size        # حداکثر حجم لاگ پیش از ساخت اسنپ‌شات جدید
+        self.sync = sync                        # اجرای fsync پس از هر نوشتن در لاگ
+        self.group_commit = group_commit        # ادغام fsync نویسنده‌های همزمان در یک fsync
+        self.async_persist = async_persist      # ذخیره‌سازی در نخ پس‌زمینه به جای نخ درخواست
+        self.flush_interval = flush_interval    # فاصله‌ی زمانی (ثانیه) بین ذخیره‌سازی‌های پس‌زمینه
+        self.flush_threshold = flush_threshold  # تعداد تغییرات کثیف که ذخیره‌سازی فوری را آغاز می‌کند
+        self.lazy_sales = lazy_sales            # بارگذاری sales.dat در اولین دسترسی به فروش‌ها
+        self.compact_interval = compact_interval  # فاصله‌ی زمانی (ثانیه) ساخت اسنپ‌شات در پس‌زمینه
         self.items = {}         # دیکشنری کالاها: {item_id: Item}
         self.items_by_name = {} # دیکشنری کالاها بر اساس نام: {name: Item}
-        self.sales = {}         # دیکشنری فروش‌ها: {sale_id: Sale}
-        self.lock = threading.Lock()  # لاک برای مدیریت همزمانی
+        self.name_index = TrigramIndex()  # ایندکس جستجوی نام کالاها
+        self._sales = None      # دیکشنری فروش‌ها: {sale_id: Sale}؛ None یعنی هنوز بارگذاری نشده
+        self.sales_load_lock = threading.Lock()  # جلوگیری از بارگذاری همزمان فروش‌ها
+        self.sales_index = SalesIndex()  # ایندکس‌های ثانویه و جمع‌های فروش
+        self.lock = SharedLock()  # نویسنده‌ها اشتراکی، batch و checkpoint انحصاری
+        self.record_locks = [threading.Lock() for _ in range(64)]  # قفل‌های ریز برای هر رکورد
+        self._local = threading.local()  # وضعیت batch و commit مخصوص هر نخ
+        self.sync_cond = threading.Condition()  # هماهنگی نخ‌ها در group commit
+        self.syncing = False    # آیا نخی در حال اجرای fsync است
+        self.written_lsn = 0    # تعداد بایت‌های نوشته‌شده در لاگ از ابتدای اجرا
+        self.synced_lsn = 0     # تعداد بایت‌هایی که fsync شده‌اند
+        self.log_lock = threading.RLock()  # ترتیب‌دهی دسترسی به فایل لاگ
+        self.dirty_cond = threading.Condition()  # محافظت از dirty و بیدار کردن نخ ذخیره‌ساز
+        self.dirty = {}         # تغییرات ذخیره‌نشده: {(نوع, شناسه): عملیات}
+        self.dirty_since = None # زمان قدیمی‌ترین تغییر ذخیره‌نشده
+        self.last_flush = time.monotonic()  # زمان آخرین ذخیره‌سازی
+        self.closing = False
+        self.compaction_lock = threading.Lock()  # جلوگیری از اجرای همزمان دو compaction
+        self.stop_compaction = threading.Event()
+        self.legacy_sales = []  # فروش‌های قدیمی که هنگام بارگذاری قیمت گرفتند و هنوز در لاگ ثبت نشده‌اند
         self.load_data()        # بارگذاری داده‌ها از فایل‌ها
+        self.log_file = open(self.log_filename, 'ab')  # فایل لاگ برای افزودن رکوردها
+        self._save_legacy_prices()
+        self.persist_thread = None
+        if self.async_persist:
+            self.persist_thread = threading.Thread(target=self._persist_loop, daemon=True)
+            self.persist_thread.start()
+        self.compaction_thread = None
+        if self.compact_interval:
+            self.compaction_thread = threading.Thread(target=self._compaction_loop, daemon=True)
+            self.compaction_thread.start()
+
+    # دیکشنری فروش‌ها؛ در حالت lazy_sales اولین دسترسی باعث بارگذاری می‌شود
+    @property
+    def sales(self):
+        if self._sales is None:
+            self._load_sales()
+        return self._sales
 
     # متد بارگذاری داده‌ها از فایل‌ها
     def load_data(self):
         # بارگذاری داده‌های کالاها
-        if os.path.exists(self.items_filename):
-            with open(self.items_filename, 'rb') as f:
-                items_data = msgpack.unpackb(f.read(), raw=False)
-                for item_dict in items_data:
-                    item = Item(**item_dict)
-                    self.items[item.id] = item
-                    self.items_by_name[item.name] = item
+        for item_dict in iter_snapshot(self.items_filename):
+            item = Item.from_dict(item_dict)
+            self.items[item.id] = item
+            self.items_by_name[item.name] = item
+            self.name_index.add(item.id, item.name)
+
+        if self.lazy_sales:
+            # فروش‌ها بعداً بارگذاری می‌شوند؛ فعلاً فقط تغییرات کالاها از لاگ اعمال می‌شود
+            self.replay_log(kinds=('item',))
+            return
 
         # بارگذاری داده‌های فروش‌ها
-        if os.path.exists(self.sales_filename):
-            with open(self.sales_filename, 'rb') as f:
-                sales_data = msgpack.unpackb(f.read(), raw=False)
-                for sale_dict in sales_data:
-                    sale = Sale(**sale_dict)
-                    self.sales[sale.id] = sale
+        self._sales = {}
+        for sale_dict in iter_snapshot(self.sales_filename):
+            sale = Sale.from_dict(sale_dict)
+            self._sales[sale.id] = sale
+
+        # اعمال تغییرات ثبت‌شده در لاگ روی آخرین اسنپ‌شات
+        self.replay_log()
+        self._index_sales(self._sales)
+
+    # بارگذاری فروش‌ها در اولین دسترسی (حالت lazy_sales)
+    def _load_sales(self):
+        with self.sales_load_lock:
+            if self._sales is not None:
+                return
+            sales = {}
+            for sale_dict in iter_snapshot(self.sales_filename):
+                sale = Sale.from_dict(sale_dict)
+                sales[sale.id] = sale
+            # تغییرات فروش‌ها در لاگ؛ تا این لحظه هیچ رکورد فروشی در این اجرا نوشته نشده است
+            with self.log_lock:
+                self.replay_log(kinds=('sale',), truncate=False, sales=sales)
+            self._index_sales(sales)
+            self._sales = sales
+            self._save_legacy_prices()
+
+    # ساخت ایندکس‌های فروش پس از بارگذاری. فروش‌های قدیمی بدون price یک بار با قیمت فعلی کالا
+    # قیمت‌گذاری و ذخیره می‌شوند تا درآمد آن‌ها با تغییر بعدی قیمت کالا یا اجرای بعدی عوض نشود
+    def _index_sales(self, sales):
+        for sale in list(sales.values()):
+            if sale.price is None and sale.item_id in self.items:
+                sale = copy.copy(sale)
+                sale.price = self.items[sale.item_id].sell_price
+                sales[sale.id] = sale
+                self.legacy_sales.append(('sale_put', sale.to_dict()))
+            self.sales_index.add(sale, self._sale_price(sale))
+
+    # ثبت قیمت فروش‌های قدیمی در لاگ (در اسنپ‌شات بعدی هم نوشته می‌شود)
+    def _save_legacy_prices(self):
+        if self.legacy_sales:
+            ops, self.legacy_sales = self.legacy_sales, []
+            self._write_log(ops)
+            self._wait_durable()
+
+    # قیمت واحد فروش؛ None برای فروش قدیمی بدون قیمت که کالای آن هم حذف شده (درآمد نامعلوم)
+    def _sale_price(self, sale):
+        return sale.price
+
+    # متد اعمال دوباره‌ی رکوردهای لاگ
+    def replay_log(self, kinds=('item', 'sale'), truncate=True, sales=None):
+        if not os.path.exists(self.log_filename):
+            return
+        valid_size = 0
+        with open(self.log_filename, 'rb') as f:
+            unpacker = msgpack.Unpacker(f, raw=False, strict_map_key=False)
+            try:
+                for record in unpacker:
+                    self._apply_record(record, kinds, sales)
+                    valid_size = unpacker.tell()
+            except (ValueError, msgpack.UnpackException):
+                pass  # رکورد خراب؛ ادامه‌ی لاگ نادیده گرفته می‌شود
+        # حذف رکورد ناقص انتهای لاگ (مثلاً پس از قطع برق در میانه‌ی نوشتن)
+        if truncate and os.path.getsize(self.log_filename) > valid_size:
+            with open(self.log_filename, 'r+b') as f:
+                f.truncate(valid_size)
+
+    # اعمال یک رکورد لاگ روی دیکشنری‌های حافظه
+    def _apply_record(self, record, kinds=('item', 'sale'), sales=None):
+        if sales is None:
+            sales = self._sales
+        for op, data in record:
+            if op[:4] not in kinds:
+                continue
+            if op == 'item_put':
+                item = Item.from_dict(data)
+                old_item = self.items.get(item.id)
+                if old_item and self.items_by_name.get(old_item.name) is old_item:
+                    del self.items_by_name[old_item.name]
+                self.items[item.id] = item
+                self.items_by_name[item.name] = item
+                if not old_item or old_item.name != item.name:
+                    self.name_index.add(item.id, item.name)
+            elif op == 'item_del':
+                item = self.items.pop(data, None)
+                if item and self.items_by_name.get(item.name) is item:
+                    del self.items_by_name[item.name]
+                self.name_index.remove(data)
+            elif op == 'sale_put':
+                sale = Sale.from_dict(data)
+                sales[sale.id] = sale
+                if sales is self._sales:
+                    self.sales_index.add(sale, self._sale_price(sale))
+            elif op == 'sale_del':
+                sales.pop(data, None)
+                if sales is self._sales:
+                    self.sales_index.remove(data)
+
+    # افزودن یک رکورد به انتهای لاگ؛ هزینه‌ی آن مستقل از تعداد کل داده‌هاست
+    def _append_log(self, ops):
+        batch_ops = getattr(self._local, 'batch_ops', None)
+        if batch_ops is not None:
+            batch_ops.extend(ops)  # در batch، تغییرات تا پایان بلوک جمع می‌شوند
+            return
+        self._persist(ops)
+
+    # ثبت تغییرات: در حالت async فقط علامت‌گذاری کثیف، در غیر این صورت نوشتن در لاگ
+    def _persist(self, ops):
+        if self.async_persist:
+            self._mark_dirty(ops)
+        else:
+            self._write_log(ops)
+
+    def _write_log(self, ops):
+        data = msgpack.packb(ops, use_bin_type=True)
+        with self.log_lock:
+            self.log_file.write(data)
+            self.log_file.flush()
+            self.written_lsn += len(data)
+            if self.sync:
+                if self.group_commit:
+                    # fsync بیرون از لاک و توسط _wait_durable انجام می‌شود
+                    self._local.pending_lsn = self.written_lsn
+                else:
+                    os.fsync(self.log_file.fileno())
+                    self.synced_lsn = self.written_lsn
+
+    # کارهای پس از آزاد کردن قفل‌ها: انتظار برای fsync و ساخت اسنپ‌شات در صورت نیاز
+    def _finish_write(self):
+        self._wait_durable()
+        self._maybe_checkpoint()
+
+    # انتظار تا پایدار شدن آخرین رکورد این نخ روی دیسک (فقط در حالت group commit)
+    def _wait_durable(self):
+        lsn = getattr(self._local, 'pending_lsn', 0)
+        if not lsn:
+            return
+        self._local.pending_lsn = 0
+        with self.sync_cond:
+            while self.synced_lsn < lsn:
+                if self.syncing:
+                    # نخ دیگری در حال fsync است؛ شاید رکورد ما را هم پوشش دهد
+                    self.sync_cond.wait()
+                    continue
+                # این نخ رهبر می‌شود و یک fsync برای همه‌ی رکوردهای نوشته‌شده انجام می‌دهد
+                self.syncing = True
+                target = self.written_lsn
+                log_file = self.log_file
+                self.sync_cond.release()
+                try:
+                    os.fsync(log_file.fileno())
+                except (OSError, ValueError):
+                    # لاگ در همین لحظه با compaction جایگزین شده و رکوردها در فایل جدید fsync شده‌اند
+                    if log_file is self.log_file:
+                        raise
+                finally:
+                    self.sync_cond.acquire()
+                    self.syncing = False
+                    self.synced_lsn = max(self.synced_lsn, target)
+                    self.sync_cond.notify_all()
+
+    # ------------------- ذخیره‌سازی پس‌زمینه -------------------
+
+    # علامت‌گذاری تغییرات به عنوان کثیف؛ تغییرات پیاپی روی یک رکورد ادغام می‌شوند
+    def _mark_dirty(self, ops):
+        with self.dirty_cond:
+            for op, data in ops:
+                key = (op[:4], data if op.endswith('_del') else data['id'])
+                self.dirty.pop(key, None)
+                self.dirty[key] = (op, data)
+            if self.dirty_since is None:
+                self.dirty_since = time.monotonic()
+            if len(self.dirty) >= self.flush_threshold:
+                self.dirty_cond.notify()
+
+    # حلقه‌ی نخ ذخیره‌ساز: ذخیره در فواصل زمانی یا با رسیدن به آستانه‌ی تغییرات
+    def _persist_loop(self):
+        while True:
+            with self.dirty_cond:
+                self.dirty_cond.wait_for(
+                    lambda: self.closing or len(self.dirty) >= self.flush_threshold,
+                    timeout=self.flush_interval)
+                if self.closing:
+                    return
+            self.flush()
+
+    # نوشتن همه‌ی تغییرات کثیف در لاگ؛ پس از بازگشت، تغییرات قبلی روی دیسک هستند
+    def flush(self):
+        with self.log_lock:
+            with self.dirty_cond:
+                ops = list(self.dirty.values())
+                self.dirty = {}
+                self.dirty_since = None
+            if ops:
+                self._write_log(ops)
+            self.last_flush = time.monotonic()
+        self._finish_write()
+
+    # میزان عقب‌ماندگی ذخیره‌سازی از تغییرات حافظه
+    def persistence_lag(self):
+        with self.dirty_cond:
+            dirty_since = self.dirty_since
+            return {
+                'dirty': len(self.dirty),
+                'seconds': time.monotonic() - dirty_since if dirty_since is not None else 0.0,
+                'since_last_flush': time.monotonic() - self.last_flush,
+            }
+
+    # ------------------- batch و تراکنش -------------------
+
+    # اجرای چند تغییر در حافظه و ثبت همه‌ی آن‌ها با یک رکورد لاگ در پایان بلوک
+    @contextmanager
+    def batch(self):
+        with self.lock:
+            if getattr(self._local, 'batch_ops', None) is not None:
+                yield self  # batch تو در تو به batch بیرونی ملحق می‌شود
+                return
+            self._local.batch_ops = []
+            self._local.undo = {}
+            try:
+                yield self
+            except BaseException:
+                self._rollback(self._local.undo)
+                raise
+            else:
+                if self._local.batch_ops:
+                    self._persist(self._local.batch_ops)
+            finally:
+                self._local.batch_ops = None
+                self._local.undo = None
+        self._finish_write()
+
+    transaction = batch
+
+    # گرفتن قفل اشتراکی و قفل رکوردهای درگیر (به ترتیب ثابت برای جلوگیری از بن‌بست)
+    @contextmanager
+    def _write_locks(self, *keys):
+        stripes = sorted({hash(key) % len(self.record_locks) for key in keys})
+        with self.lock.shared():
+            for stripe in stripes:
+                self.record_locks[stripe].acquire()
+            try:
+                yield
+            finally:
+                for stripe in reversed(stripes):
+                    self.record_locks[stripe].release()
+
+    # ذخیره‌ی وضعیت قبلی کالا برای بازگردانی در صورت خطا
+    def _remember_item(self, item_id):
+        undo = getattr(self._local, 'undo', None)
+        if undo is not None and ('item', item_id) not in undo:
+            item = self.items.get(item_id)
+            undo[('item', item_id)] = item.to_dict() if item else None
+
+    # ذخیره‌ی وضعیت قبلی فروش برای بازگردانی در صورت خطا
+    def _remember_sale(self, sale_id):
+        undo = getattr(self._local, 'undo', None)
+        if undo is not None and ('sale', sale_id) not in undo:
+            sale = self.sales.get(sale_id)
+            undo[('sale', sale_id)] = sale.to_dict() if sale else None
+
+    # بازگرداندن دیکشنری‌های items، items_by_name و sales به وضعیت پیش از batch
+    def _rollback(self, undo):
+        ops = []
+        for (kind, key), data in undo.items():
+            if data is None:
+                ops.append((kind + '_del', key))
+            else:
+                ops.append((kind + '_put', data))
+        self._apply_record(ops)
+
+    # نوشتن اتمیک اسنپ‌شات: فایل موقت، سرآیند با طول و checksum، fsync و سپس جایگزینی با os.replace؛
+    # در صورت قطع برنامه در هر لحظه، فایل قبلی دست‌نخورده باقی می‌ماند.
+    def _write_snapshot(self, filename, records):
+        records = list(records)
+        packer = msgpack.Packer(use_bin_type=True)
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, 0, 0))  # سرآیند موقت
+            checksum = 0
+            length = 0
+            for chunk in self._snapshot_chunks(packer, records):
+                f.write(chunk)
+                checksum = zlib.crc32(chunk, checksum)
+                length += len(chunk)
+            f.seek(0)
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, checksum, length))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+        fsync_directory(filename)
+
+    @staticmethod
+    def _snapshot_chunks(packer, records):
+        yield packer.pack_array_header(len(records))
+        for record in records:
+            yield packer.pack(record.to_dict())
 
     # متد ذخیره‌سازی کالاها در فایل
     def save_items(self):
         with self.lock:
-            with open(self.items_filename, 'wb') as f:
-                data = [item.to_dict() for item in self.items.values()]
-                f.write(msgpack.packb(data, use_bin_type=True))
+            self._write_snapshot(self.items_filename, self.items.values())
 
     # متد ذخیره‌سازی فروش‌ها در فایل
     def save_sales(self):
         with self.lock:
-            with open(self.sales_filename, 'wb') as f:
-                data = [sale.to_dict() for sale in self.sales.values()]
-                f.write(msgpack.packb(data, use_bin_type=True))
+            self._write_snapshot(self.sales_filename, self.sales.values())
+
+    # ساخت اسنپ‌شات کامل و کوتاه کردن لاگ (compaction)
+    def checkpoint(self):
+        with self.compaction_lock:
+            self._checkpoint()
+
+    # حجم فعلی لاگ؛ زیر log_lock خوانده می‌شود چون _truncate_log فایل قبلی را می‌بندد
+    def _log_size(self):
+        with self.log_lock:
+            if self.log_file.closed:
+                return 0
+            return self.log_file.tell()
+
+    # ساخت اسنپ‌شات در صورت بزرگ شدن بیش از حد لاگ
+    def _maybe_checkpoint(self):
+        if self._log_size() >= self.max_log_size:
+            # اگر نخ دیگری در حال compaction است، همان کافی است
+            if self.compaction_lock.acquire(blocking=False):
+                try:
+                    if self._log_size() >= self.max_log_size:
+                        self._checkpoint()
+                finally:
+                    self.compaction_lock.release()
+
+    def _checkpoint(self):
+        self.sales  # در حالت lazy_sales، فروش‌ها پیش از نوشتن اسنپ‌شات بارگذاری می‌شوند
+        # رکوردها درجا تغییر نمی‌کنند، پس کپی فهرست مقادیر زیر قفل انحصاری یک اسنپ‌شات سازگار است
+        with self.lock:
+            with self.log_lock:
+                items = list(self.items.values())
+                sales = list(self._sales.values())
+                log_offset = self.log_file.tell()
+        # نوشتن اسنپ‌شات (کار O(N)) بیرون از قفل‌ها؛ نویسنده‌ها در این مدت ادامه می‌دهند
+        self._write_snapshot(self.items_filename, items)
+        self._write_snapshot(self.sales_filename, sales)
+        with self.lock:
+            with self.log_lock:
+                self._truncate_log(log_offset)
+
+    # حذف بخش ابتدایی لاگ که اکنون در اسنپ‌شات است؛ رکوردهای پس از log_offset به لاگ جدید منتقل می‌شوند.
+    # رکوردهای لاگ تکرارپذیرند، پس قطع شدن برنامه پیش از جایگزینی لاگ مشکلی ایجاد نمی‌کند.
+    def _truncate_log(self, log_offset):
+        self.log_file.flush()
+        tmp_filename = self.log_filename + '.tmp'
+        with open(self.log_filename, 'rb') as src, open(tmp_filename, 'wb') as dst:
+            src.seek(log_offset)
+            shutil.copyfileobj(src, dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_filename, self.log_filename)
+        fsync_directory(self.log_filename)
+        old_log_file = self.log_file
+        self.log_file = open(self.log_filename, 'ab')
+        old_log_file.close()
+        # رکوردهای منتقل‌شده fsync شده‌اند
+        with self.sync_cond:
+            self.synced_lsn = max(self.synced_lsn, self.written_lsn)
+
+    # حلقه‌ی نخ compaction: ساخت اسنپ‌شات تازه در فواصل زمانی ثابت
+    def _compaction_loop(self):
+        while not self.stop_compaction.wait(self.compact_interval):
+            if self._log_size() > 0:
+                self.checkpoint()
+
+    # توقف نخ ذخیره‌ساز، ذخیره‌ی تغییرات باقی‌مانده و بستن فایل لاگ
+    def close(self):
+        if self.compaction_thread:
+            self.stop_compaction.set()
+            self.compaction_thread.join()
+            self.compaction_thread = None
+        if self.persist_thread:
+            with self.dirty_cond:
+                self.closing = True
+                self.dirty_cond.notify()
+            self.persist_thread.join()
+            self.persist_thread = None
+        with self.lock:
+            if not self.log_file.closed:
+                self.flush()
+                self.log_file.close()
 
     # ------------------- عملیات CRUD برای کالاها -------------------
+    # رکوردهای منتشرشده هرگز درجا تغییر نمی‌کنند؛ نویسنده نسخه‌ی جدیدی می‌سازد و جایگزین می‌کند
+    # تا خواننده‌ها بدون قفل، همیشه یک نسخه‌ی کامل (قدیم یا جدید) ببینند.
 
     # ایجاد کالا (Create)
     def create_item(self, item_id, name, buy_price, sell_price, quantity):
-        with self.lock:
+        with self._write_locks(('item', item_id)):
             if item_id in self.items:
                 return False  # آیتم با این ID وجود دارد
+            self._remember_item(item_id)
             item = Item(item_id, name, buy_price, sell_price, quantity)
             self.items[item_id] = item
             self.items_by_name[name] = item
-            self.save_items()
-            return True
+            self.name_index.add(item_id, name)
+            self._append_log([('item_put', item.to_dict())])
+        self._finish_write()
+        return True
 
     # خواندن کالا بر اساس ID (Read)
     def read_item_by_id(self, item_id):
@@ -107,45 +824,69 @@ class DataManager:
 
     # به‌روزرسانی کالا (Update)
     def update_item(self, item_id, **kwargs):
-        with self.lock:
-            item = self.items.get(item_id)
-            if item:
-                for key, value in kwargs.items():
-                    setattr(item, key, value)
-                # به‌روزرسانی دیکشنری items_by_name در صورت تغییر نام
-                if 'name' in kwargs:
-                    self.items_by_name.pop(item.name, None)
-                    self.items_by_name[kwargs['name']] = item
-                self.save_items()
-                return True
-            return False
+        with self._write_locks(('item', item_id)):
+            old_item = self.items.get(item_id)
+            if not old_item:
+                return False
+            self._remember_item(item_id)
+            item = copy.copy(old_item)
+            for key, value in kwargs.items():
+                setattr(item, key, value)
+            self.items[item_id] = item
+            self.items_by_name[item.name] = item
+            # حذف نام قدیمی از items_by_name در صورت تغییر نام
+            if item.name != old_item.name:
+                if self.items_by_name.get(old_item.name) is old_item:
+                    del self.items_by_name[old_item.name]
+                self.name_index.add(item_id, item.name)
+            self._append_log([('item_put', item.to_dict())])
+        self._finish_write()
+        return True
 
     # حذف کالا (Delete)
     def delete_item(self, item_id):
-        with self.lock:
-            item = self.items.pop(item_id, None)
-            if item:
-                self.items_by_name.pop(item.name, None)
-                self.save_items()
-                return True
-            return False
+        with self._write_locks(('item', item_id)):
+            if item_id not in self.items:
+                return False
+            self._remember_item(item_id)
+            item = self.items.pop(item_id)
+            if self.items_by_name.get(item.name) is item:
+                del self.items_by_name[item.name]
+            self.name_index.remove(item_id)
+            self._append_log([('item_del', item_id)])
+        self._finish_write()
+        return True
+
+    # جایگزینی کالا با نسخه‌ای که موجودی آن تغییر کرده است
+    def _adjust_quantity(self, item_id, delta):
+        item = copy.copy(self.items[item_id])
+        item.quantity += delta
+        self.items[item_id] = item
+        self.items_by_name[item.name] = item
+        return item
 
     # ------------------- عملیات CRUD برای فروش‌ها -------------------
 
     # ایجاد فروش (Create)
-    def create_sale(self, sale_id, item_id, quantity, client, date):
-        with self.lock:
+    def create_sale(self, sale_id, item_id, quantity, client, date, price=None):
+        with self._write_locks(('sale', sale_id), ('item', item_id)):
             if sale_id in self.sales:
                 return False  # فروش با این ID وجود دارد
             if item_id not in self.items:
                 return False  # کالای مورد نظر وجود ندارد
-            sale = Sale(sale_id, item_id, quantity, client, date)
+            self._remember_sale(sale_id)
+            self._remember_item(item_id)
+            if price is None:
+                price = self.items[item_id].sell_price  # قیمت فروش فعلی کالا
+            sale = Sale(sale_id, item_id, quantity, client, date, price)
             self.sales[sale_id] = sale
+            self.sales_index.add(sale, price)
             # کاهش تعداد موجودی کالا
-            self.items[item_id].quantity -= quantity
-            self.save_sales()
-            self.save_items()
-            return True
+            item = self._adjust_quantity(item_id, -quantity)
+            self._append_log([('sale_put', sale.to_dict()),
+                              ('item_put', item.to_dict())])
+        self._finish_write()
+        return True
 
     # خواندن فروش (Read)
     def read_sale(self, sale_id):
@@ -153,32 +894,54 @@ class DataManager:
 
     # به‌روزرسانی فروش (Update)
     def update_sale(self, sale_id, **kwargs):
-        with self.lock:
-            sale = self.sales.get(sale_id)
-            if sale:
-                for key, value in kwargs.items():
-                    setattr(sale, key, value)
-                self.save_sales()
-                return True
-            return False
+        with self._write_locks(('sale', sale_id)):
+            if sale_id not in self.sales:
+                return False
+            self._remember_sale(sale_id)
+            sale = copy.copy(self.sales[sale_id])
+            for key, value in kwargs.items():
+                setattr(sale, key, value)
+            self.sales[sale_id] = sale
+            self.sales_index.add(sale, self._sale_price(sale))
+            self._append_log([('sale_put', sale.to_dict())])
+        self._finish_write()
+        return True
 
     # حذف فروش (Delete)
     def delete_sale(self, sale_id):
-        with self.lock:
-            sale = self.sales.pop(sale_id, None)
-            if sale:
+        while True:
+            sale = self.sales.get(sale_id)
+            if not sale:
+                return False
+            # قفل کالا به item_id فروش وابسته است، پس پس از گرفتن قفل دوباره بررسی می‌شود
+            with self._write_locks(('sale', sale_id), ('item', sale.item_id)):
+                if self.sales.get(sale_id) is not sale:
+                    continue
+                self._remember_sale(sale_id)
+                self._remember_item(sale.item_id)
+                del self.sales[sale_id]
+                self.sales_index.remove(sale_id)
+                ops = [('sale_del', sale_id)]
                 # افزایش تعداد موجودی کالا به میزان حذف شده
-                self.items[sale.item_id].quantity += sale.quantity
-                self.save_sales()
-                self.save_items()
-                return True
-            return False
+                if sale.item_id in self.items:
+                    item = self._adjust_quantity(sale.item_id, sale.quantity)
+                    ops.append(('item_put', item.to_dict()))
+                self._append_log(ops)
+            break
+        self._finish_write()
+        return True
 
     # ------------------- متدهای کمکی -------------------
 
-    # جستجوی کالاها بر اساس بخشی از نام
-    def search_items_by_name(self, name_part):
-        return [item for item in self.items.values() if name_part.lower() in item.name.lower()]
+    # جستجوی کالاها بر اساس بخشی از نام با استفاده از ایندکس trigram
+    # mode='substring' هر جای نام و mode='prefix' ابتدای کلمات نام را جستجو می‌کند
+    def search_items_by_name(self, name_part, mode='substring', limit=None):
+        results = []
+        for item_id in self.name_index.search(name_part, mode, limit):
+            item = self.items.get(item_id)
+            if item:
+                results.append(item)
+        return results
 
     # دریافت تمام کالاها
     def get_all_items(self):
@@ -188,6 +951,40 @@ class DataManager:
     def get_all_sales(self):
         return list(self.sales.values())
 
+    # یافتن فروش‌ها از روی ایندکس؛ در حالت lazy_sales ایندکس پس از بارگذاری فروش‌ها ساخته می‌شود
+    def _sales_for(self, sale_ids_func, *args):
+        sales = self.sales
+        found = [sales[sale_id] for sale_id in sale_ids_func(*args) if sale_id in sales]
+        return sorted(found, key=lambda sale: sale.date)
+
+    # فروش‌های یک کالا
+    def get_sales_by_item(self, item_id):
+        return self._sales_for(self.sales_index.sale_ids, 'item', item_id)
+
+    # فروش‌های یک مشتری
+    def get_sales_by_client(self, client):
+        return self._sales_for(self.sales_index.sale_ids, 'client', client)
+
+    # فروش‌های یک روز یا یک بازه‌ی تاریخ (شامل هر دو سر بازه)
+    def get_sales_by_date(self, start, end=None):
+        return self._sales_for(self.sales_index.sale_ids_between, start, start if end is None else end)
+
+    # جمع تعداد و درآمد فروش به تفکیک 'item'، 'client' یا 'date': {کلید: (تعداد، درآمد)}
+    def sales_totals(self, by='item'):
+        if by not in self.sales_index.totals:
+            raise ValueError(f'گروه‌بندی نامعتبر: {by}')
+        self.sales  # در حالت lazy_sales، ایندکس پس از بارگذاری فروش‌ها ساخته می‌شود
+        return dict(self.sales_index.totals[by])
+
+    # فروش‌هایی که درآمدشان نامعلوم است (قدیمی، بدون قیمت و کالای حذف‌شده) و در sales_totals نیامده
+    def unpriced_sales(self):
+        self.sales
+        return set(self.sales_index.unpriced)
+
+    # تعداد فروش رفته از هر کالا
+    def units_sold_per_item(self):
+        return {item_id: units for item_id, (units, _) in self.sales_totals('item').items()}
+
 # ------------------- مثال از استفاده از DataManager -------------------
 
 if __name__ == '__main__':
@@ -246,3 +1043,7 @@ if __name__ == '__main__':
     print("لیست تمام فروش‌ها:")
     for sale in manager.get_all_sales():
         print(f"- فروش ID {sale.id}, کالای {sale.item_id}, مشتری: {sale.client}")
+
+    # ساخت اسنپ‌شات و بستن لاگ
+    manager.checkpoint()
+    manager.close()
@@ -1,23 +1,41 @@
 import json
 import os
 
+import jsonl_store
+
 class ItemManagerJSON:
-    def __init__(self, filename='items.json'):
+    # jsonl=True stores one appended line per mutation instead of rewriting the whole file
+    def __init__(self, filename='items.json', jsonl=False):
         self.filename = filename
+        self.jsonl = jsonl
         self.items = {}
         self.load()
 
     def load(self):
-        if os.path.exists(self.filename):
+        if self.jsonl:
+            self.items = jsonl_store.load_items(self.filename)
+        elif os.path.exists(self.filename):
             with open(self.filename, 'r', encoding='utf-8') as f:
                 self.items = json.load(f)
         else:
             self.items = {}
 
     def save(self):
+        if self.jsonl:
+            jsonl_store.write_items(self.filename, self.items.values())
+            return
         with open(self.filename, 'w', encoding='utf-8') as f:
             json.dump(self.items, f, indent=4, ensure_ascii=False)
 
+    # Rewrites a JSON Lines file with one line per live item.
+    compact = save
+
+    def _save_item(self, item_id):
+        if self.jsonl:
+            jsonl_store.append_put(self.filename, self.items[item_id])
+        else:
+            self.save()
+
     def create_item(self, item_id, name, buy_price, sell_price, quantity):
         item = {
             'id': item_id,
@@ -27,7 +45,7 @@ class ItemManagerJSON:
             'quantity': quantity
         }
         self.items[item_id] = item
-        self.save()
+        self._save_item(item_id)
 
     def read_item(self, item_id):
         return self.items.get(item_id)
@@ -37,21 +55,25 @@ class ItemManagerJSON:
         if item:
             item.update(kwargs)
             self.items[item_id] = item
-            self.save()
+            self._save_item(item_id)
             return True
         return False
 
     def delete_item(self, item_id):
         if item_id in self.items:
             del self.items[item_id]
-            self.save()
+            if self.jsonl:
+                jsonl_store.append_delete(self.filename, item_id)
+            else:
+                self.save()
             return True
         return False
 
-# مثال استفاده:
-manager_json = ItemManagerJSON()
-manager_json.create_item('1', 'Laptop', 1000, 1200, 10)
-item = manager_json.read_item('1')
-print(item)
-manager_json.update_item('1', quantity=15)
-manager_json.delete_item('1')
+if __name__ == '__main__':
+    # مثال استفاده:
+    manager_json = ItemManagerJSON()
+    manager_json.create_item('1', 'Laptop', 1000, 1200, 10)
+    item = manager_json.read_item('1')
+    print(item)
+    manager_json.update_item('1', quantity=15)
+    manager_json.delete_item('1')
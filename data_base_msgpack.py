@@ -1,14 +1,79 @@
+import mmap
 import msgpack
 import os
+import struct
+
+# Indexed file format (indexed=True):
+#   header | msgpack records | packed keys | index entries sorted by packed key
+# The header holds the record count and where the keys and the index start, and each
+# index entry is (key offset, key length, record offset, record length). A lookup is a
+# binary search over the mmap'd index that decodes only the record it lands on.
+MAGIC = b'IMP1'
+HEADER = struct.Struct('>4sQQQ')
+ENTRY = struct.Struct('>QIQI')
+
+# Single-item writes in indexed mode are appended to a delta log next to the file, one
+# msgpack [packed key, item or None] pair each, instead of rewriting it. Lookups check the
+# delta (replayed into memory on open) before the index, and once the log holds
+# merge_threshold changes it is merged into the indexed file in one rewrite.
+def log_filename(filename):
+    return filename + '.log'
+
+# Durability follows the snapshot sequence in data_base_fast: fsync the new file, os.replace
+# it over the old one, then fsync the directory so the rename (or a removal) survives a
+# crash too. Without the directory fsync the log could be gone while the new file is not.
+def fsync_directory(filename):
+    if os.name != 'posix':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_indexed(filename, records):
+    # Writes (packed key, packed record) pairs in any order as an indexed file. Records are
+    # streamed to disk as they come; only the index is collected and sorted in memory, and
+    # for a repeated key the last record wins.
+    entries = []
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, 0, 0))
+        for key, record in records:
+            entries.append((key, f.tell(), len(record)))
+            f.write(record)
+        entries.sort(key=lambda entry: entry[0])
+        entries = [entry for position, entry in enumerate(entries)
+                   if position + 1 == len(entries) or entries[position + 1][0] != entry[0]]
+        keys_offset = f.tell()
+        for position, (key, record_offset, record_length) in enumerate(entries):
+            entries[position] = (f.tell(), len(key), record_offset, record_length)
+            f.write(key)
+        index_offset = f.tell()
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(entries), keys_offset, index_offset))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(entries)
 
 class ItemManagerMsgPack:
-    def __init__(self, filename='items.dat'):
+    def __init__(self, filename='items.dat', indexed=False, merge_threshold=1000):
         self.filename = filename
+        self.log_filename = log_filename(filename)
+        self.indexed = indexed
+        self.merge_threshold = merge_threshold
         self.items = {}
+        self.delta = {}         # packed key -> item, or None for a deleted item
+        self.log_size = 0       # entries in the delta log, repeated keys included
+        self.mm = None
+        self.count = 0
         self.load()
 
     def load(self):
-        if os.path.exists(self.filename):
+        if self.indexed:
+            self._open_indexed()
+        elif os.path.exists(self.filename):
             with open(self.filename, 'rb') as f:
                 data = msgpack.unpackb(f.read(), raw=False)
                 self.items = data
@@ -16,10 +81,150 @@ class ItemManagerMsgPack:
             self.items = {}
 
     def save(self):
+        if self.indexed:
+            # In indexed mode self.items only stages bulk changes until the next save.
+            self._rewrite({self._pack_key(key): item for key, item in self.items.items()})
+            self.items = {}
+            return
         with open(self.filename, 'wb') as f:
             data = self.items
             f.write(msgpack.packb(data, use_bin_type=True))
 
+    def _open_indexed(self):
+        self.close()
+        self._load_log()
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0:
+            return
+        with open(self.filename, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                # Old single-map file: convert it once to the indexed format.
+                f.seek(0)
+                items = msgpack.unpackb(f.read(), raw=False)
+                self._rewrite({self._pack_key(key): item for key, item in items.items()})
+                return
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, self.count, self.keys_offset, self.index_offset = HEADER.unpack_from(self.mm, 0)
+
+    def _load_log(self):
+        self.delta = {}
+        self.log_size = 0
+        if not os.path.exists(self.log_filename):
+            return
+        valid_size = 0
+        with open(self.log_filename, 'rb') as f:
+            unpacker = msgpack.Unpacker(f, raw=False)
+            for key, item in unpacker:
+                self.delta[key] = item
+                self.log_size += 1
+                valid_size = unpacker.tell()
+        if os.path.getsize(self.log_filename) > valid_size:
+            # Drop a torn last entry so the next append starts on a clean boundary.
+            with open(self.log_filename, 'r+b') as f:
+                f.truncate(valid_size)
+
+    def _log(self, key, item):
+        if self.count == 0:
+            # Nothing to merge into yet; writing the file directly costs the same.
+            self._rewrite({key: item})
+            return
+        created = not os.path.exists(self.log_filename)
+        with open(self.log_filename, 'ab') as f:
+            f.write(msgpack.packb([key, item], use_bin_type=True))
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            fsync_directory(self.log_filename)
+        self.delta[key] = item
+        self.log_size += 1
+        if self.log_size >= self.merge_threshold:
+            self.merge()
+
+    def merge(self):
+        # Folds the delta log into the indexed file.
+        if self.delta:
+            self._rewrite({})
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.count = 0
+
+    @staticmethod
+    def _pack_key(item_id):
+        return msgpack.packb(item_id, use_bin_type=True)
+
+    def _entry(self, position):
+        return ENTRY.unpack_from(self.mm, self.index_offset + position * ENTRY.size)
+
+    def _key(self, entry):
+        return self.mm[entry[0]:entry[0] + entry[1]]
+
+    def _record(self, entry):
+        return self.mm[entry[2]:entry[2] + entry[3]]
+
+    def _find(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            middle_key = self._key(entry)
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return entry
+        return None
+
+    def _iter_raw(self):
+        for position in range(self.count):
+            entry = self._entry(position)
+            yield self._key(entry), self._record(entry)
+
+    def iter_items(self):
+        if not self.indexed:
+            yield from self.items.values()
+            return
+        for _, record in self._merge(self._iter_raw(), sorted(self.delta.items())):
+            yield msgpack.unpackb(record, raw=False)
+
+    def _rewrite(self, changes):
+        # Merges the existing sorted records with the delta and the changes (packed key ->
+        # item or None) record by record, so only the index, not the records, is held in
+        # memory. The log is dropped only after the new file is durably in place; replaying
+        # it again after a crash in between would only repeat changes the file already has.
+        pending = sorted({**self.delta, **changes}.items())
+        tmp_filename = self.filename + '.tmp'
+        write_indexed(tmp_filename, self._merge(self._iter_raw(), pending))
+        self.close()
+        os.replace(tmp_filename, self.filename)
+        fsync_directory(self.filename)
+        if os.path.exists(self.log_filename):
+            os.remove(self.log_filename)
+            fsync_directory(self.log_filename)
+        self._open_indexed()
+
+    @staticmethod
+    def _merge(existing, pending):
+        pending = iter(pending)
+        change = next(pending, None)
+        for key, record in existing:
+            while change is not None and change[0] < key:
+                if change[1] is not None:
+                    yield change[0], msgpack.packb(change[1], use_bin_type=True)
+                change = next(pending, None)
+            if change is not None and change[0] == key:
+                if change[1] is not None:
+                    yield key, msgpack.packb(change[1], use_bin_type=True)
+                change = next(pending, None)
+            else:
+                yield key, record
+        while change is not None:
+            if change[1] is not None:
+                yield change[0], msgpack.packb(change[1], use_bin_type=True)
+            change = next(pending, None)
+
     def create_item(self, item_id, name, buy_price, sell_price, quantity):
         item = {
             'id': item_id,
@@ -28,32 +233,53 @@ class ItemManagerMsgPack:
             'sell_price': sell_price,
             'quantity': quantity
         }
+        if self.indexed:
+            self._log(self._pack_key(item_id), item)
+            return
         self.items[item_id] = item
         self.save()
 
     def read_item(self, item_id):
+        if self.indexed:
+            key = self._pack_key(item_id)
+            if key in self.delta:
+                item = self.delta[key]
+                return dict(item) if item is not None else None
+            if self.mm is None:
+                return None
+            entry = self._find(key)
+            return msgpack.unpackb(self._record(entry), raw=False) if entry else None
         return self.items.get(item_id)
 
     def update_item(self, item_id, **kwargs):
-        item = self.items.get(item_id)
+        item = self.read_item(item_id)
         if item:
             item.update(kwargs)
+            if self.indexed:
+                self._log(self._pack_key(item_id), item)
+                return True
             self.items[item_id] = item
             self.save()
             return True
         return False
 
     def delete_item(self, item_id):
+        if self.indexed:
+            if self.read_item(item_id) is None:
+                return False
+            self._log(self._pack_key(item_id), None)
+            return True
         if item_id in self.items:
             del self.items[item_id]
             self.save()
             return True
         return False
 
-# مثال استفاده:
-manager_msgpack = ItemManagerMsgPack()
-manager_msgpack.create_item('1', 'Laptop', 1000, 1200, 10)
-item = manager_msgpack.read_item('1')
-print(item)
-manager_msgpack.update_item('1', quantity=15)
-manager_msgpack.delete_item('1')
+if __name__ == '__main__':
+    # مثال استفاده:
+    manager_msgpack = ItemManagerMsgPack()
+    manager_msgpack.create_item('1', 'Laptop', 1000, 1200, 10)
+    item = manager_msgpack.read_item('1')
+    print(item)
+    manager_msgpack.update_item('1', quantity=15)
+    manager_msgpack.delete_item('1')
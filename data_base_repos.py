@@ -1,5 +1,8 @@
 import json
 import os
+from collections.abc import MutableMapping
+
+import jsonl_store
 
 class Item:
     def __init__(self, item_id, name, buy_price, sell_price, quantity):
@@ -9,53 +12,199 @@ class Item:
         self.sell_price = sell_price
         self.quantity = quantity
 
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], data['name'], data['buy_price'], data['sell_price'], data['quantity'])
+
+def journal_filename(filename):
+    # Side journal of a plain JSON repository file.
+    return os.path.splitext(filename)[0] + '.changes.jsonl'
+
+class RepositoryItems(MutableMapping):
+    # Live view of a repository's items: reads hydrate lazily and writes go through
+    # add_item/delete_item, so `repo.items['2'] = Item(...)` is tracked like add_item.
+    def __init__(self, repo):
+        self.repo = repo
+
+    def __getitem__(self, item_id):
+        item = self.repo.get_item(item_id)
+        if item is None:
+            raise KeyError(item_id)
+        return item
+
+    def __setitem__(self, item_id, item):
+        self.repo._put(item_id, item)
+        self.repo.deleted.discard(item_id)
+        self.repo._changed()
+
+    def __delitem__(self, item_id):
+        if not self.repo.delete_item(item_id):
+            raise KeyError(item_id)
+
+    def __iter__(self):
+        return iter(list(self.repo.records))
+
+    def __len__(self):
+        return len(self.repo.records)
+
 class ItemRepository:
-    def __init__(self, filename='items.json'):
+    # jsonl=True stores one appended line per change instead of rewriting the whole file.
+    # A plain JSON file gets the same lines in a side journal (items.changes.jsonl) that is
+    # replayed on load and folded back into the JSON file by compact(), or automatically
+    # once it holds compact_threshold changes.
+    # Items are hydrated lazily on first access and kept in an identity map, so get_item
+    # returns the same object every time. Changes are tracked and commit() persists only
+    # the added, modified and deleted items; with autosave=True every mutation commits.
+    def __init__(self, filename='items.json', jsonl=False, autosave=True, compact_threshold=10000):
         self.filename = filename
-        self.items = {}
+        self.journal_filename = journal_filename(filename)
+        self.jsonl = jsonl
+        self.autosave = autosave
+        self.compact_threshold = compact_threshold
         self.load()
 
     def load(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r', encoding='utf-8') as f:
-                items_data = json.load(f)
-                self.items = {item_id: Item(**data) for item_id, data in items_data.items()}
+        self.journal_size = 0
+        if self.jsonl:
+            self.records = jsonl_store.load_items(self.filename)
         else:
-            self.items = {}
+            self.records = {}
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    self.records = json.load(f)
+            for record in jsonl_store.iter_records(self.journal_filename):
+                if record['op'] == 'put':
+                    self.records[record['item']['id']] = record['item']
+                elif record['op'] == 'del':
+                    self.records.pop(record['id'], None)
+                self.journal_size += 1
+        self.identity = {}
+        self.added = set()
+        self.modified = set()
+        self.deleted = set()
+
+    @property
+    def items(self):
+        # Iterating hydrates everything; prefer get_item on large catalogs.
+        return RepositoryItems(self)
+
+    @items.setter
+    def items(self, items):
+        self.deleted.update(self.records)
+        self.records = {}
+        self.identity = {}
+        self.added = set()
+        self.modified = set()
+        for item_id, item in items.items():
+            self._put(item_id, item)
+
+    def _put(self, item_id, item):
+        self.records[item_id] = None
+        self.identity[item_id] = item
+        self.added.add(item_id)
+
+    def _record(self, item_id):
+        item = self.identity.get(item_id)
+        return dict(item.__dict__) if item is not None else self.records[item_id]
+
+    def dirty_items(self, detect_in_place=True):
+        # Items changed through add_item/update_item, plus (when detect_in_place is set)
+        # hydrated items that callers changed in place; that check is O(hydrated items).
+        dirty = self.added | self.modified
+        if detect_in_place:
+            for item_id, item in self.identity.items():
+                if item_id not in dirty and item.__dict__ != self.records[item_id]:
+                    dirty.add(item_id)
+        return dirty
+
+    def commit(self, detect_in_place=True):
+        dirty = self.dirty_items(detect_in_place)
+        if not dirty and not self.deleted:
+            return
+        filename = self.filename if self.jsonl else self.journal_filename
+        for item_id in self.deleted:
+            jsonl_store.append_delete(filename, item_id)
+        for item_id in dirty:
+            record = self._record(item_id)
+            jsonl_store.append_put(filename, record)
+            self.records[item_id] = record
+        if not self.jsonl:
+            self.journal_size += len(self.deleted) + len(dirty)
+        self._clear_changes()
+        if self.journal_size >= self.compact_threshold:
+            self.save()
 
     def save(self):
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            items_data = {item_id: item.__dict__ for item_id, item in self.items.items()}
-            json.dump(items_data, f, indent=4, ensure_ascii=False)
+        if self.jsonl:
+            jsonl_store.write_items(self.filename, (self._record(item_id) for item_id in self.records))
+        else:
+            tmp_filename = self.filename + '.tmp'
+            with open(tmp_filename, 'w', encoding='utf-8') as f:
+                items_data = {item_id: self._record(item_id) for item_id in self.records}
+                json.dump(items_data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_filename, self.filename)
+            if os.path.exists(self.journal_filename):
+                os.remove(self.journal_filename)
+            self.journal_size = 0
+        for item_id in self.identity:
+            self.records[item_id] = dict(self.identity[item_id].__dict__)
+        self._clear_changes()
+
+    # Rewrites a JSON Lines file with one line per live item, or folds the journal of a
+    # plain JSON file back into it.
+    compact = save
+
+    def _clear_changes(self):
+        self.added = set()
+        self.modified = set()
+        self.deleted = set()
+
+    def _changed(self):
+        if self.autosave:
+            self.commit(detect_in_place=False)
 
     def add_item(self, item):
-        self.items[item.id] = item
-        self.save()
+        self._put(item.id, item)
+        self.deleted.discard(item.id)
+        self._changed()
 
     def get_item(self, item_id):
-        return self.items.get(item_id)
+        item = self.identity.get(item_id)
+        if item is None:
+            data = self.records.get(item_id)
+            if data is None:
+                return None
+            item = Item.from_dict(data)
+            self.identity[item_id] = item
+        return item
 
     def update_item(self, item_id, **kwargs):
-        item = self.items.get(item_id)
+        item = self.get_item(item_id)
         if item:
             for key, value in kwargs.items():
                 setattr(item, key, value)
-            self.save()
+            self.modified.add(item_id)
+            self._changed()
             return True
         return False
 
     def delete_item(self, item_id):
-        if item_id in self.items:
-            del self.items[item_id]
-            self.save()
+        if item_id in self.records:
+            del self.records[item_id]
+            self.identity.pop(item_id, None)
+            self.added.discard(item_id)
+            self.modified.discard(item_id)
+            self.deleted.add(item_id)
+            self._changed()
             return True
         return False
 
-# مثال استفاده:
-repo = ItemRepository()
-item = Item('1', 'Laptop', 1000, 1200, 10)
-repo.add_item(item)
-retrieved_item = repo.get_item('1')
-print(retrieved_item.__dict__)
-repo.update_item('1', quantity=15)
-repo.delete_item('1')
+if __name__ == '__main__':
+    # مثال استفاده:
+    repo = ItemRepository()
+    item = Item('1', 'Laptop', 1000, 1200, 10)
+    repo.add_item(item)
+    retrieved_item = repo.get_item('1')
+    print(retrieved_item.__dict__)
+    repo.update_item('1', quantity=15)
+    repo.delete_item('1')
@@ -0,0 +1,237 @@
+import sqlite3
+
+from aggregate_cache import AggregateCache
+from lru_cache import LRUCache
+from sqlite_migrations import migrate
+from sqlite_pool import ConnectionPool, bulk_insert, iter_rows
+from sqlite_reports import client_sales, page_key, sales_between
+from sqlite_search import create_search_index, register_functions, search_items
+from sqlite_summary import create_sales_summary, rebuild_sales_summary
+from storage import ITEMS_TABLE, SALES_TABLE, sqlite_item_row, sqlite_sale_row
+
+# The store's SQLite data layer. It needs no display: problems the caller has to handle
+# are raised as DatabaseError subclasses, and the GUI (ui.py) turns them into messages.
+
+def item_key(item_id):
+    # Cache key of one item row. The UI passes Treeview iids ('5') as well as ints (5).
+    try:
+        return ("item", int(item_id))
+    except (TypeError, ValueError):
+        return ("item", item_id)
+
+class DatabaseError(Exception):
+    pass
+
+class DuplicateItemError(DatabaseError):
+    def __init__(self, name):
+        super().__init__(f"An item named {name!r} already exists")
+        self.name   =   name
+
+class DatabaseManager:
+    # Every thread uses its own pooled connection; pragmas (wal, synchronous, cache_size,
+    # mmap_size, ...) are passed through to ConnectionPool.
+    def __init__(self, db_name, item_cache_size=1024, **pragmas):
+        # the search triggers call normalize_name(), so every connection registers it
+        self.pool   =   ConnectionPool(db_name, on_connect=register_functions, **pragmas)
+        # dashboard aggregates, invalidated by the mutations below
+        self.aggregates =   AggregateCache()
+        # item rows by ("item", id) and the ("items",) name/id list; see item_cache_stats()
+        self.items  =   LRUCache(item_cache_size)
+        self.create_tables()
+
+    @property
+    def conn(self):
+        return self.pool.connection()
+
+    @property
+    def cursor(self):
+        return self.pool.cursor()
+
+    def create_tables(self):
+        try:
+            self.cursor.execute(ITEMS_TABLE)
+            self.cursor.execute(SALES_TABLE)
+            self.conn.commit()
+        except Exception as e:
+            print(f"Error while creating tables:\n{e}")
+        # versioned schema changes such as the sales indexes (see sqlite_migrations.py)
+        migrate(self.conn)
+        # FTS5 trigram index on item names (see sqlite_search.py); False if unsupported
+        self.fts    =   create_search_index(self.conn)
+        # per-item and per-day sales totals kept by triggers (see sqlite_summary.py)
+        create_sales_summary(self.conn)
+
+    def search_items_db(self, value, limit=None):
+        columns =   "items.quantity, items.sel_prc, items.buy_prc, items.name, items.id"
+        if not value:
+            query   =   f"SELECT {columns} FROM items ORDER BY id LIMIT ?"
+            return self.conn.execute(query, (-1 if limit is None else limit,)).fetchall()
+        return search_items(self.conn, value, columns, limit, self.fts)
+
+    def list_items_db(self, after=None, limit=200):
+        # All items in id order, a keyset page at a time: pass the last id of a page as `after`.
+        columns =   "quantity, sel_prc, buy_prc, name, id"
+        query   =   f"SELECT {columns} FROM items WHERE id > ? ORDER BY id LIMIT ?"
+        return self.conn.execute(query, (-1 if after is None else after, limit)).fetchall()
+
+    def search_items_db_by_id(self, item_id):
+        # [(quantity, sel_prc, buy_prc, name, id)] like search_items_db, or [] if no such item
+        row =   self.items.get(item_key(item_id), lambda: self.load_item(item_id))
+        return [row] if row else []
+
+    def load_item(self, item_id):
+        query   =   "SELECT quantity, sel_prc, buy_prc, name, id FROM items WHERE id=?"
+        return self.conn.execute(query, (item_id,)).fetchone()
+
+    def insert_item_db(self, values):
+        try:
+            query   =   "INSERT INTO items (name, buy_prc, sel_prc, quantity) VALUES (?,?,?,?)"
+            self.cursor.execute(query, values)
+            self.conn.commit()
+            self.aggregates.invalidate("inventory")
+            # a new id may have been looked up (and cached as missing) before
+            self.items.invalidate(item_key(self.cursor.lastrowid), ("items",))
+            return True
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE" not in str(e):
+                print(f"Error while inserting item:\n{e}")
+                return False
+            raise DuplicateItemError(values[0]) from e
+        except Exception as e:
+            print(f"Error while inserting item:\n{e}")
+            return False
+
+    def update_item_db(self, item_id, values):
+        try:
+            query = "UPDATE items SET name=?, buy_prc=?, sel_prc=?, quantity=? WHERE id=?"
+            self.cursor.execute(query, (*values, item_id))
+            self.conn.commit()
+            self.aggregates.invalidate("inventory", "sales")
+            self.items.invalidate(item_key(item_id), ("items",))
+            return True
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE" not in str(e):
+                print(f"Error while updating item:\n{e}")
+                return False
+            raise DuplicateItemError(values[0]) from e
+        except Exception as e:
+            print(f"Error while updating item:\n{e}")
+            return False
+
+    def delete_item_db(self, item_id):
+        try:
+            query = "DELETE FROM items WHERE id=?"
+            self.cursor.execute(query, (item_id,))
+            self.conn.commit()
+            self.aggregates.invalidate("inventory", "sales")
+            self.items.invalidate(item_key(item_id), ("items",))
+            return True
+        except Exception as e:
+            print(f"Error while deleting item:\n{e}")
+            return False
+
+    def insert_sale_db(self, values):
+        try:
+            query   =   "INSERT INTO sales (item_id, quantity, client, date) VALUES(?,?,?,?)"
+            self.cursor.execute(query, values)
+            self.conn.commit()
+            self.aggregates.invalidate("sales")
+            return True
+        except Exception as e:
+            print(f"Error while inserting sale:\n{e}")
+            return False
+
+    # Bulk loads: records are value tuples like insert_item_db/insert_sale_db take, or dicts
+    # streamed from storage.open_engine(...).iter_records() / storage.iter_sales(...).
+    # Rows are written with executemany in chunked transactions; returns (inserted, rejected)
+    # where rejected lists (row, error) pairs, e.g. duplicate names.
+    def import_items_db(self, records, chunk_size=10000):
+        query   =   "INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (?,?,?,?,?)"
+        rows    =   (sqlite_item_row(r) if isinstance(r, dict) else (None, *r) for r in records)
+        try:
+            return bulk_insert(self.conn, query, rows, chunk_size)
+        finally:
+            self.aggregates.invalidate("inventory")
+            self.items.clear()
+
+    def import_sales_db(self, records, chunk_size=10000):
+        query   =   "INSERT INTO sales (id, item_id, quantity, client, date) VALUES (?,?,?,?,?)"
+        rows    =   (sqlite_sale_row(r) if isinstance(r, dict) else (None, *r) for r in records)
+        try:
+            return bulk_insert(self.conn, query, rows, chunk_size)
+        finally:
+            self.aggregates.invalidate("sales")
+
+    # Streaming exports in the same dict shape, e.g.
+    #   storage.open_engine('csv', 'items.csv').write_records(db.export_items_db())
+    def export_items_db(self):
+        query   =   "SELECT id, name, buy_prc, sel_prc, quantity FROM items ORDER BY id"
+        for row in iter_rows(self.conn, query):
+            yield dict(zip(('id', 'name', 'buy_price', 'sell_price', 'quantity'), row))
+
+    def export_sales_db(self):
+        query   =   "SELECT id, item_id, quantity, client, date FROM sales ORDER BY id"
+        for row in iter_rows(self.conn, query):
+            yield dict(zip(('id', 'item_id', 'quantity', 'client', 'date'), row))
+
+    def retrieve_item_list_db(self):
+        return list(self.items.get(("items",), self.load_item_list))
+
+    def load_item_list(self):
+        query   =   "SELECT name, id FROM items"
+        self.cursor.execute(query)
+        data    =   self.cursor.fetchall()
+        return tuple(data)
+
+    def item_cache_stats(self):
+        return self.items.stats()
+
+    def get_sales_data(self):
+        return self.aggregates.get("sales", self.load_sales_data)
+
+    def load_sales_data(self):
+        query = '''
+            SELECT items.name, sales_by_item.quantity
+            FROM sales_by_item
+            JOIN items ON items.id = sales_by_item.item_id
+            ORDER BY sales_by_item.quantity DESC
+        '''
+        self.cursor.execute(query)
+        data = self.cursor.fetchall()
+        return data
+
+    def get_daily_sales_data(self):
+        query = '''
+            SELECT date, quantity FROM sales_by_day ORDER BY date
+        '''
+        self.cursor.execute(query)
+        data = self.cursor.fetchall()
+        return data
+
+    def rebuild_summaries_db(self):
+        rebuild_sales_summary(self.conn)
+        self.aggregates.invalidate("sales")
+
+    # Keyset-paged sales reports (see sqlite_reports.py). Rows are (id, date, item_id, name,
+    # quantity, client); pass the returned key as `after` for the next page, None means done.
+    def get_sales_by_date_db(self, start, end, after=None, limit=100):
+        rows    =   sales_between(self.conn, start, end, after, limit)
+        return rows, page_key(rows) if len(rows) == limit else None
+
+    def get_client_sales_db(self, client, after=None, limit=100):
+        rows    =   client_sales(self.conn, client, after, limit)
+        return rows, page_key(rows) if len(rows) == limit else None
+
+    def get_inventory_data(self):
+        return self.aggregates.get("inventory", self.load_inventory_data)
+
+    def load_inventory_data(self):
+        query = '''
+            SELECT name, quantity FROM items
+        '''
+        self.cursor.execute(query)
+        data = self.cursor.fetchall()
+        return data
+
+    def close_connection(self):
+        self.pool.close()
@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+
+# Shared helpers for the JSON Lines storage mode of ItemManagerJSON and ItemRepository.
+# Every mutation appends one compact line:
+#   {"op":"put","item":{...}}   or   {"op":"del","id":...}
+# and loading replays the lines in order, one line at a time.
+
+def dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+def iter_records(filename):
+    if not os.path.exists(filename):
+        return
+    complete = 0
+    with open(filename, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # torn last line from an interrupted append
+            complete += len(line)
+            if line.strip():
+                yield json.loads(line.decode('utf-8'))
+    if complete < os.path.getsize(filename):
+        # Drop the torn line so the next append starts on a fresh line.
+        with open(filename, 'r+b') as f:
+            f.truncate(complete)
+
+def load_items(filename):
+    items = {}
+    for record in iter_records(filename):
+        if record['op'] == 'put':
+            items[record['item']['id']] = record['item']
+        elif record['op'] == 'del':
+            items.pop(record['id'], None)
+    return items
+
+def append_put(filename, item):
+    append_line(filename, dumps({'op': 'put', 'item': item}))
+
+def append_delete(filename, item_id):
+    append_line(filename, dumps({'op': 'del', 'id': item_id}))
+
+def append_line(filename, line):
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+
+def write_items(filename, items):
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(dumps({'op': 'put', 'item': item}) + '\n')
+    os.replace(tmp_filename, filename)
+
+def compact(filename):
+    write_items(filename, load_items(filename).values())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compact a JSON Lines item store')
+    parser.add_argument('command', choices=['compact'])
+    parser.add_argument('filename')
+    args = parser.parse_args()
+    before = os.path.getsize(args.filename)
+    compact(args.filename)
+    print(f'{args.filename}: {before} -> {os.path.getsize(args.filename)} bytes')
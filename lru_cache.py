@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+
+# Bounded read-through cache for DatabaseManager's item lookups. get() returns the cached
+# value for a key, or runs the loader and keeps its result, evicting the least recently
+# used key once more than maxsize are held. Mutations call invalidate() with the keys they
+# affect. As in AggregateCache, a value loaded while an invalidation happened is returned
+# but not kept; here one counter covers every key, so the key space stays unbounded.
+
+class LRUCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.values = OrderedDict()
+        self.version = 0            # number of invalidations so far, of any key
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, load):
+        with self.lock:
+            if key in self.values:
+                self.hits += 1
+                self.values.move_to_end(key)
+                return self.values[key]
+            self.misses += 1
+            version = self.version
+        value = load()
+        with self.lock:
+            if self.version == version:
+                self.values[key] = value
+                self.values.move_to_end(key)
+                while len(self.values) > self.maxsize:
+                    self.values.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.values.pop(key, None)
+            self.version += 1
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+            self.version += 1
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self.values), 'maxsize': self.maxsize}
@@ -0,0 +1,18 @@
+import unicodedata
+
+# Item-name normalization shared by DataManager's name index (data_base_fast) and the
+# SQLite search index (sqlite_search), so both match names the same way.
+
+# نگاشت نویسه‌های عربی و نویسه‌های کنترلی به معادل فارسی برای یکسان‌سازی جستجو
+PERSIAN_NORMALIZATION = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', 'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    '\u200c': ' ', '\u200d': None, '\u0640': None,  # نیم‌فاصله، اتصال‌دهنده و کشیده
+    **{chr(c): None for c in range(0x064B, 0x0653)},   # اعراب
+    **{chr(0x06F0 + d): str(d) for d in range(10)},     # ارقام فارسی
+    **{chr(0x0660 + d): str(d) for d in range(10)},     # ارقام عربی
+})
+
+# یکسان‌سازی نام برای جستجو: حروف کوچک، نویسه‌های فارسی یکسان و فاصله‌های یکتا
+def normalize_name(name):
+    name = unicodedata.normalize('NFKC', name).casefold().translate(PERSIAN_NORMALIZATION)
+    return ' '.join(name.split())
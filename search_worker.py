@@ -0,0 +1,89 @@
+import queue
+import sqlite3
+import threading
+
+# Runs searches on a daemon thread so the Tk main loop never waits for the database. Only
+# the latest query matters: submit() supersedes whatever is queued and interrupts a
+# superseded query that is still running, and poll() (called from the main loop through
+# after()) hands back only the result of the newest query.
+
+class SearchWorker:
+    def __init__(self, search, connect=None):
+        self.search = search        # search(value) -> rows, run on the worker thread
+        self.connect = connect      # returns the worker thread's connection, for interrupt()
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.generation = 0         # number of the newest submitted query
+        self.running = None         # number of the query being run, if any
+        self.finished = 0           # number of the newest query whose result is queued
+        self.conn = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, value):
+        with self.lock:
+            self.generation += 1
+            self.requests.put((self.generation, value))
+            if self.running is not None and self.conn is not None:
+                self.conn.interrupt()
+
+    def pending(self):
+        with self.lock:
+            return self.finished != self.generation
+
+    def poll(self):
+        # Returns (True, rows) once the newest query has finished, otherwise (False, None).
+        # An error raised by that query is raised here, on the caller's thread.
+        latest = (False, None)
+        while True:
+            try:
+                generation, rows = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.generation:
+                latest = (True, rows)
+        if isinstance(latest[1], Exception):
+            raise latest[1]
+        return latest
+
+    def close(self):
+        self.requests.put(None)
+
+    def _run(self):
+        if self.connect is not None:
+            self.conn = self.connect()
+        while True:
+            request = self.requests.get()
+            # Skip straight to the newest request; the ones before it are stale.
+            while request is not None:
+                try:
+                    newer = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                request = newer
+            if request is None:
+                # The pool closes this thread's connection once the thread ends.
+                with self.lock:
+                    self.conn = None
+                return
+            generation, value = request
+            with self.lock:
+                if generation != self.generation:
+                    continue
+                self.running = generation
+            try:
+                rows = self.search(value)
+            except Exception as e:
+                rows = e
+            # The result is queued and `finished` updated under the lock, so once pending()
+            # is False the newest result is already waiting for poll().
+            with self.lock:
+                self.running = None
+                if isinstance(rows, sqlite3.OperationalError) and 'interrupted' in str(rows):
+                    if generation == self.generation:
+                        # interrupt() landed on this query just after it replaced a stale one
+                        self.requests.put(request)
+                    continue
+                self.results.put((generation, rows))
+                self.finished = generation
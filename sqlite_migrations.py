@@ -0,0 +1,28 @@
+from sqlite_pool import atomic
+
+# Versioned schema changes for DatabaseManager databases. PRAGMA user_version holds the
+# number of migrations already applied; migrate() runs the remaining ones in order, each in
+# its own transaction together with the version bump. Append new migrations, never edit or
+# reorder applied ones.
+
+MIGRATIONS = [
+    # 1: sales lookups by item, date range and client; the rowid is part of every index, so
+    #    (date, id) keyset pagination is served by the index order.
+    [
+        'CREATE INDEX IF NOT EXISTS sales_item_id ON sales(item_id, date)',
+        'CREATE INDEX IF NOT EXISTS sales_date ON sales(date)',
+        'CREATE INDEX IF NOT EXISTS sales_client ON sales(client, date)',
+    ],
+]
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn):
+    version = schema_version(conn)
+    for number, statements in enumerate(MIGRATIONS[version:], version + 1):
+        with atomic(conn):
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {number}')
+    return schema_version(conn)
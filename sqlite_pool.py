@@ -0,0 +1,173 @@
+import itertools
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+# Thread-safe access to one SQLite database: every thread gets its own connection (and
+# cursor), opened lazily and tuned with the pragmas below. In WAL mode readers never block
+# the writer or each other, and synchronous=NORMAL makes a commit an append to the WAL
+# instead of a full journal sync. Each connection keeps its own prepared-statement cache
+# (cached_statements), so repeated queries with the same SQL text are not re-parsed.
+# on_connect(conn) runs for every new connection, e.g. to register SQL functions.
+# A thread's connection is closed when the thread exits (its thread-local slot is released),
+# and close_all() closes every open one; threads that use the pool again reconnect.
+
+_memory_ids = itertools.count()
+
+class _ThreadConnection:
+    # One thread's connection and cursor, held only by that thread's local storage, so it is
+    # collected, and the connection closed, as soon as the thread ends.
+    __slots__ = ('conn', 'cursor', 'closed', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.closed = False
+        weakref.finalize(self, conn.close)
+
+    def close(self):
+        self.closed = True
+        self.conn.close()
+
+class ConnectionPool:
+    def __init__(self, db_name, wal=True, synchronous='NORMAL', cache_size=-64000,
+                 mmap_size=256 * 1024 * 1024, busy_timeout=5.0, cached_statements=256, on_connect=None):
+        self.db_name = db_name
+        self.uri = False
+        if db_name == ':memory:':
+            # Separate connections to ':memory:' would each see an empty database.
+            self.db_name = f'file:pool{next(_memory_ids)}?mode=memory&cache=shared'
+            self.uri = True
+            wal = False
+        self.wal = wal
+        self.synchronous = synchronous
+        self.cache_size = cache_size        # pages, or KiB when negative
+        self.mmap_size = mmap_size          # bytes of the file read through mmap
+        self.busy_timeout = busy_timeout    # seconds to wait for a lock held by another connection
+        self.cached_statements = cached_statements
+        self.on_connect = on_connect
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = weakref.WeakSet()    # open _ThreadConnection of each live thread
+        self.closed = False
+        self.keepalive = None
+        if self.uri:
+            # A shared in-memory database lives only while a connection to it is open.
+            self.keepalive = self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, uri=self.uri,
+                               check_same_thread=False, cached_statements=self.cached_statements)
+        if self.wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA cache_size={int(self.cache_size)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        if self.on_connect is not None:
+            self.on_connect(conn)
+        return conn
+
+    def _thread_connection(self):
+        current = getattr(self.local, 'current', None)
+        if current is None or current.closed:
+            current = _ThreadConnection(self._connect())
+            with self.lock:
+                if self.closed:
+                    current.close()
+                    raise sqlite3.ProgrammingError('Cannot operate on a closed connection pool.')
+                self.connections.add(current)
+            self.local.current = current
+        return current
+
+    def connection(self):
+        return self._thread_connection().conn
+
+    def cursor(self):
+        return self._thread_connection().cursor
+
+    @contextmanager
+    def transaction(self):
+        # Commits on success and rolls back on error, on the calling thread's connection.
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def close_all(self):
+        # Closes the connections of all threads. It must not race with queries still running
+        # on them; a thread that uses the pool afterwards gets a new connection.
+        with self.lock:
+            connections = list(self.connections)
+            self.connections.clear()
+        for current in connections:
+            current.close()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self.close_all()
+        if self.keepalive is not None:
+            self.keepalive.close()
+
+def bulk_insert(conn, query, rows, chunk_size=10000):
+    # Inserts rows with executemany, one transaction per chunk. A chunk that fails is rolled
+    # back and retried row by row, so a bad row (a duplicate name, a missing field) is
+    # rejected on its own instead of aborting the load. Returns (inserted, rejected), where
+    # rejected holds (row, error message) pairs.
+    inserted = 0
+    rejected = []
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            inserted += _insert_chunk(conn, query, chunk, rejected)
+            chunk = []
+    inserted += _insert_chunk(conn, query, chunk, rejected)
+    return inserted, rejected
+
+def _insert_chunk(conn, query, chunk, rejected):
+    if not chunk:
+        return 0
+    try:
+        with conn:
+            conn.executemany(query, chunk)
+        return len(chunk)
+    except sqlite3.Error:
+        pass
+    inserted = 0
+    with conn:
+        for row in chunk:
+            try:
+                conn.execute(query, row)
+                inserted += 1
+            except sqlite3.Error as e:
+                rejected.append((row, str(e)))
+    return inserted
+
+def iter_rows(conn, query, params=(), size=1000):
+    # Streams the result of a query with fetchmany instead of building it with fetchall.
+    cursor = conn.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cursor.close()
+
+@contextmanager
+def atomic(conn):
+    # An explicit transaction. The sqlite3 module only opens one implicitly before
+    # INSERT/UPDATE/DELETE, so CREATE statements would otherwise each commit on their own.
+    # Inside a transaction the caller already opened, the work joins it instead.
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute('BEGIN')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
@@ -0,0 +1,35 @@
+# Paged sales reports for DatabaseManager. Pages use keyset pagination: rows are ordered
+# by (date, id) and the next page starts after the (date, id) of the previous page's last
+# row, where OFFSET would walk past every skipped row. SQLite seeks a row-value comparison
+# like (date, id) > (?, ?) on date alone, so a page deep inside one busy day would still
+# scan that day's earlier rows. A page is therefore read in two index seeks (see
+# sqlite_migrations): the rest of the current date by rowid, then the following dates.
+
+SALE_COLUMNS = 'sales.id, sales.date, sales.item_id, items.name, sales.quantity, sales.client'
+
+def page_key(rows):
+    # The `after` argument for the page following rows, or None after the last page.
+    return (rows[-1][1], rows[-1][0]) if rows else None
+
+def _page(conn, where, params, after, limit):
+    query = f'''
+        SELECT {SALE_COLUMNS} FROM sales LEFT JOIN items ON items.id = sales.item_id
+        WHERE {where} AND %s
+        ORDER BY %s
+        LIMIT ?
+    '''
+    if after is None:
+        return conn.execute(query % ('1', 'sales.date, sales.id'), (*params, limit)).fetchall()
+    date, sale_id = after
+    rows = conn.execute(query % ('sales.date = ? AND sales.id > ?', 'sales.id'),
+                        (*params, date, sale_id, limit)).fetchall()
+    if len(rows) < limit:
+        rows += conn.execute(query % ('sales.date > ?', 'sales.date, sales.id'),
+                             (*params, date, limit - len(rows))).fetchall()
+    return rows
+
+def sales_between(conn, start, end, after=None, limit=100):
+    return _page(conn, 'sales.date BETWEEN ? AND ?', (start, end), after, limit)
+
+def client_sales(conn, client, after=None, limit=100):
+    return _page(conn, 'sales.client = ?', (client,), after, limit)
@@ -0,0 +1,106 @@
+import sqlite3
+
+from name_normalization import normalize_name
+from sqlite_pool import atomic
+
+# Full-text search over items.name for DatabaseManager. items_fts is an FTS5 table with the
+# trigram tokenizer (any substring of three or more characters is indexed) holding a
+# normalized copy of every name, kept in sync by triggers on items. Names are normalized by
+# name_normalization.normalize_name, the same function DataManager uses: in SQL through a
+# registered function on the way in, and in Python for the query, so 'كالا' finds 'کالا'
+# and case folding is the same for every script, not only ASCII. The triggers and the
+# items_name_key index call normalize_name(), so every connection that writes to items
+# has to register it first: register_functions(conn), or ConnectionPool(on_connect=...).
+
+def _normalize(value):
+    return normalize_name(value) if isinstance(value, str) else value
+
+def register_functions(conn):
+    conn.create_function('normalize_name', 1, _normalize, deterministic=True)
+
+# Prefix matches come from an expression index on the normalized name, read in index order.
+# Substring matches are ranked (shorter names first) among at most RANK_CANDIDATES rows, so
+# a broad query such as 'کالا' on a large catalog never sorts every match before LIMIT.
+NAME_KEY = 'normalize_name(items.name)'
+NAME_INDEX = 'CREATE INDEX IF NOT EXISTS items_name_key ON items(normalize_name(name))'
+RANK_CANDIDATES = 1000
+
+SEARCH_SCHEMA = [
+    "CREATE VIRTUAL TABLE items_fts USING fts5(name, tokenize='trigram')",
+    '''
+    CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, name) VALUES (new.id, normalize_name(new.name));
+    END
+    ''',
+    '''
+    CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN
+        DELETE FROM items_fts WHERE rowid = old.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER items_fts_update AFTER UPDATE OF id, name ON items BEGIN
+        DELETE FROM items_fts WHERE rowid = old.id;
+        INSERT INTO items_fts(rowid, name) VALUES (new.id, normalize_name(new.name));
+    END
+    ''',
+]
+
+# Databases indexed before normalize_name() was registered used nested replace() calls
+# and ASCII-only lower(); their index objects are dropped and rebuilt.
+OLD_SCHEMA = [
+    'DROP INDEX IF EXISTS items_name_prefix',
+    'DROP TRIGGER IF EXISTS items_fts_insert',
+    'DROP TRIGGER IF EXISTS items_fts_delete',
+    'DROP TRIGGER IF EXISTS items_fts_update',
+    'DROP TABLE IF EXISTS items_fts',
+]
+
+def create_search_index(conn):
+    # Creates the index and fills it from the existing items on first use. Returns False
+    # when this SQLite build has no FTS5/trigram support; callers then fall back to LIKE.
+    register_functions(conn)
+    trigger = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'items_fts_insert'").fetchone()
+    try:
+        with atomic(conn):
+            if trigger is not None and 'normalize_name(' in trigger[0]:
+                conn.execute(NAME_INDEX)
+                return True
+            for statement in OLD_SCHEMA + SEARCH_SCHEMA + [NAME_INDEX]:
+                conn.execute(statement)
+            conn.execute("INSERT INTO items_fts(rowid, name) SELECT id, normalize_name(name) FROM items")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+def search_items(conn, value, columns, limit=None, fts=True):
+    # Items whose name contains value. Names starting with it come first, then shorter
+    # names; with a limit, only the first RANK_CANDIDATES other matches are ranked.
+    # Queries shorter than a trigram, or without FTS5, scan the normalized names.
+    query = normalize_name(value)
+    if not fts or len(query) < 3:
+        return conn.execute(f"SELECT {columns} FROM items WHERE instr({NAME_KEY}, ?) ORDER BY id LIMIT ?",
+                            (query, -1 if limit is None else limit)).fetchall()
+    match = '"' + query.replace('"', '""') + '"'
+    if limit is None:
+        return conn.execute(f'''
+            SELECT {columns} FROM items_fts JOIN items ON items.id = items_fts.rowid
+            WHERE items_fts MATCH ?
+            ORDER BY instr(items_fts.name, ?) != 1, length(items_fts.name), items.id
+        ''', (match, query)).fetchall()
+    prefix = conn.execute(f'''
+        SELECT items.id, {columns} FROM items
+        WHERE {NAME_KEY} >= ? AND {NAME_KEY} < ?
+        ORDER BY {NAME_KEY} LIMIT ?
+    ''', (query, query + '\U0010ffff', limit)).fetchall()
+    if len(prefix) == limit:
+        return [row[1:] for row in prefix]
+    # Every prefix match is in `prefix` now; fill up with the other substring matches.
+    seen = {row[0] for row in prefix}
+    others = conn.execute(f'''
+        SELECT items.id, {columns}
+        FROM (SELECT rowid, name FROM items_fts WHERE items_fts MATCH ? LIMIT ?) AS matches
+        JOIN items ON items.id = matches.rowid
+        ORDER BY length(matches.name), items.id
+    ''', (match, max(RANK_CANDIDATES, limit))).fetchall()
+    rows = prefix + [row for row in others if row[0] not in seen]
+    return [row[1:] for row in rows[:limit]]
@@ -0,0 +1,89 @@
+import argparse
+import sqlite3
+
+from sqlite_pool import atomic
+
+# Materialized sales aggregates for DatabaseManager: sales_by_item and sales_by_day hold the
+# total quantity and the number of sales per item and per day. Triggers on sales keep them
+# current inside the writing transaction, so dashboard queries read O(items) or O(days)
+# rows instead of aggregating the whole sales history. A row whose last sale is deleted
+# is removed.
+
+SUMMARY_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS sales_by_item(
+        item_id     INTEGER PRIMARY KEY,
+        quantity    INTEGER NOT NULL,
+        sales       INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS sales_by_day(
+        date        TEXT    PRIMARY KEY,
+        quantity    INTEGER NOT NULL,
+        sales       INTEGER NOT NULL
+    )
+    ''',
+]
+
+_ADD = '''
+        INSERT INTO sales_by_item(item_id, quantity, sales) VALUES (new.item_id, new.quantity, 1)
+            ON CONFLICT(item_id) DO UPDATE SET quantity = quantity + excluded.quantity, sales = sales + 1;
+        INSERT INTO sales_by_day(date, quantity, sales) VALUES (new.date, new.quantity, 1)
+            ON CONFLICT(date) DO UPDATE SET quantity = quantity + excluded.quantity, sales = sales + 1;
+'''
+
+_SUBTRACT = '''
+        UPDATE sales_by_item SET quantity = quantity - old.quantity, sales = sales - 1
+            WHERE item_id = old.item_id;
+        DELETE FROM sales_by_item WHERE item_id = old.item_id AND sales = 0;
+        UPDATE sales_by_day SET quantity = quantity - old.quantity, sales = sales - 1
+            WHERE date = old.date;
+        DELETE FROM sales_by_day WHERE date = old.date AND sales = 0;
+'''
+
+SUMMARY_TRIGGERS = [
+    f'CREATE TRIGGER sales_summary_insert AFTER INSERT ON sales BEGIN {_ADD} END',
+    f'CREATE TRIGGER sales_summary_delete AFTER DELETE ON sales BEGIN {_SUBTRACT} END',
+    f'CREATE TRIGGER sales_summary_update AFTER UPDATE OF item_id, quantity, date ON sales BEGIN '
+    f'{_SUBTRACT} {_ADD} END',
+]
+
+def create_sales_summary(conn):
+    # Creates the tables and triggers, backfilling them from existing sales on first use.
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sales_summary_insert'").fetchone():
+        return
+    with atomic(conn):
+        for statement in SUMMARY_SCHEMA + SUMMARY_TRIGGERS:
+            conn.execute(statement)
+        _backfill(conn)
+
+def rebuild_sales_summary(conn):
+    # Recomputes both tables from sales, e.g. after sales were changed with triggers disabled.
+    with conn:
+        _backfill(conn)
+
+def _backfill(conn):
+    conn.execute('DELETE FROM sales_by_item')
+    conn.execute('DELETE FROM sales_by_day')
+    conn.execute('''
+        INSERT INTO sales_by_item(item_id, quantity, sales)
+        SELECT item_id, SUM(quantity), COUNT(*) FROM sales GROUP BY item_id
+    ''')
+    conn.execute('''
+        INSERT INTO sales_by_day(date, quantity, sales)
+        SELECT date, SUM(quantity), COUNT(*) FROM sales GROUP BY date
+    ''')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the sales summary tables of a database')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('db_name')
+    args = parser.parse_args()
+    conn = sqlite3.connect(args.db_name)
+    create_sales_summary(conn)
+    rebuild_sales_summary(conn)
+    items, days = (conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                   for table in ('sales_by_item', 'sales_by_day'))
+    print(f'{args.db_name}: {items} items, {days} days')
+    conn.close()
@@ -0,0 +1,29 @@
+from aggregate_cache import AggregateCache
+
+
+def test_values_are_cached_until_invalidated():
+    cache = AggregateCache()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get('sales', load) == 1
+    assert cache.get('sales', load) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.invalidate('sales', 'inventory')
+    assert cache.get('sales', load) == 2
+
+
+def test_value_loaded_during_an_invalidation_is_not_kept():
+    cache = AggregateCache()
+
+    def load():
+        # تغییری هم‌زمان با خواندن رخ می‌دهد؛ نتیجه ممکن است قدیمی باشد
+        cache.invalidate('sales')
+        return 'stale'
+
+    assert cache.get('sales', load) == 'stale'
+    assert cache.get('sales', lambda: 'fresh') == 'fresh'
+    assert cache.get('sales', lambda: 'other') == 'fresh'
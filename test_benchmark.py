@@ -0,0 +1,14 @@
+import json
+
+import benchmark
+
+
+def test_benchmark_runs_every_backend(tmp_path):
+    output = tmp_path / 'results.json'
+    results = benchmark.main(['--sizes', '50', '--ops', '5', '--max-seconds', '1', '--json', str(output)])
+    assert sorted(result['backend'] for result in results) == sorted(benchmark.BACKENDS)
+    for result in results:
+        assert result['file_bytes'] > 0
+        assert set(result['phases']) == set(benchmark.PHASES)
+        assert result['phases']['create']['ops'] == 5
+    assert json.loads(output.read_text(encoding='utf-8')) == results
@@ -0,0 +1,73 @@
+import csv
+import os
+
+from data_base_csv import ItemManagerCSV
+
+
+def test_csv_appends_and_journals_changes(tmp_path):
+    filename = str(tmp_path / 'items.csv')
+    manager = ItemManagerCSV(filename)
+    for i in range(5):
+        manager.create_item(str(i), f'کالا {i}', 10, 12, 5)
+    main_size = os.path.getsize(filename)
+    manager.update_item('1', quantity=15)
+    manager.delete_item('0')
+    # به‌روزرسانی و حذف فایل اصلی را بازنویسی نمی‌کنند
+    assert os.path.getsize(filename) == main_size
+    assert manager.read_item('0') is None
+    assert manager.read_item('4')['name'] == 'کالا 4'
+
+    manager.create_item('0', 'کالای جدید', 1, 2, 3)
+    reloaded = ItemManagerCSV(filename)
+    assert reloaded.read_item('1')['quantity'] == '15'
+    assert reloaded.read_item('0')['name'] == 'کالای جدید'
+    assert len(reloaded.items) == 5
+
+    reloaded.compact()
+    assert not os.path.exists(reloaded.journal_filename)
+    with open(filename, newline='', encoding='utf-8') as f:
+        rows = {row['id']: row for row in csv.DictReader(f)}
+    assert rows['1']['quantity'] == '15' and rows['0']['name'] == 'کالای جدید' and len(rows) == 5
+
+
+def test_csv_export_without_trailing_newline(tmp_path):
+    filename = tmp_path / 'items.csv'
+    filename.write_text('id,name,buy_price,sell_price,quantity\r\n7,Laptop,1000,1200,10', encoding='utf-8')
+    manager = ItemManagerCSV(str(filename))
+    manager.create_item('8', 'Tablet', 500, 650, 3)
+    assert ItemManagerCSV(str(filename)).read_item('8')['name'] == 'Tablet'
+    assert ItemManagerCSV(str(filename)).read_item('7')['quantity'] == '10'
+
+
+def test_csv_keeps_the_export_column_order_and_extra_columns(tmp_path):
+    filename = tmp_path / 'items.csv'
+    filename.write_text('name,id,quantity,sell_price,buy_price,barcode\r\nLaptop,7,10,1200,1000,626\r\n',
+                        encoding='utf-8')
+    manager = ItemManagerCSV(str(filename))
+    manager.create_item('8', 'Mouse', 5, 7, 3)
+    manager.update_item('7', quantity=9)
+    reloaded = ItemManagerCSV(str(filename))
+    assert reloaded.read_item('8')['name'] == 'Mouse' and reloaded.read_item('8')['buy_price'] == '5'
+    assert reloaded.read_item('7')['quantity'] == '9' and reloaded.read_item('7')['barcode'] == '626'
+
+    # ستون ناشناخته در به‌روزرسانی و فشرده‌سازی حفظ می‌شود
+    reloaded.update_item('8', barcode='901')
+    reloaded.compact()
+    with open(filename, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = {row['id']: row for row in reader}
+    assert reader.fieldnames == ['name', 'id', 'quantity', 'sell_price', 'buy_price', 'barcode']
+    assert rows['7']['barcode'] == '626' and rows['8']['barcode'] == '901'
+    assert rows['7']['quantity'] == '9'
+
+
+def test_compaction_keeps_the_file_row_order(tmp_path):
+    filename = tmp_path / 'items.csv'
+    filename.write_text('id,name,buy_price,sell_price,quantity\r\n' +
+                        ''.join(f'{i},کالا {i},1,2,3\r\n' for i in (9, 4, 7, 1, 5)), encoding='utf-8')
+    manager = ItemManagerCSV(str(filename))
+    manager.delete_item('4')
+    manager.update_item('1', quantity=8)
+    manager.compact()
+    with open(filename, newline='', encoding='utf-8') as f:
+        assert [row['id'] for row in csv.DictReader(f)] == ['9', '7', '1', '5']
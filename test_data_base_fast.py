@@ -0,0 +1,321 @@
+import os
+import threading
+import time
+
+import msgpack
+import pytest
+
+from data_base_fast import DataManager, SnapshotError
+
+
+def make_manager(tmp_path, **kwargs):
+    return DataManager(items_filename=str(tmp_path / 'items.dat'),
+                       sales_filename=str(tmp_path / 'sales.dat'),
+                       log_filename=str(tmp_path / 'changes.log'),
+                       sync=False, **kwargs)
+
+
+def test_log_replay_restores_state(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    manager.create_item(2, 'تبلت', 500, 650, 30)
+    manager.update_item(1, name='لپ‌تاپ گیمینگ', quantity=45)
+    manager.delete_item(2)
+    manager.create_sale(1, 1, 5, 'علی', '1402-08-20')
+    manager.close()
+    # هیچ اسنپ‌شاتی نوشته نشده و همه چیز از لاگ بازسازی می‌شود
+    assert not os.path.exists(tmp_path / 'items.dat')
+
+    reloaded = make_manager(tmp_path)
+    assert reloaded.read_item_by_id(1).quantity == 40
+    assert reloaded.read_item_by_name('لپ‌تاپ گیمینگ') is reloaded.read_item_by_id(1)
+    assert reloaded.read_item_by_name('لپ‌تاپ') is None
+    assert reloaded.read_item_by_id(2) is None
+    assert reloaded.read_sale(1).client == 'علی'
+    reloaded.close()
+
+
+def test_checkpoint_truncates_log(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'گوشی', 300, 400, 100)
+    manager.checkpoint()
+    assert os.path.getsize(tmp_path / 'changes.log') == 0
+    manager.update_item(1, quantity=90)
+    manager.close()
+
+    reloaded = make_manager(tmp_path)
+    assert reloaded.read_item_by_id(1).quantity == 90
+    reloaded.close()
+
+
+def test_torn_log_tail_is_discarded(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'گوشی', 300, 400, 100)
+    manager.close()
+    valid_size = os.path.getsize(tmp_path / 'changes.log')
+    with open(tmp_path / 'changes.log', 'ab') as f:
+        f.write(b'\x91\x92\xa8item_put')  # رکورد نیمه‌کاره
+
+    reloaded = make_manager(tmp_path)
+    assert reloaded.read_item_by_id(1).name == 'گوشی'
+    assert os.path.getsize(tmp_path / 'changes.log') == valid_size
+    reloaded.create_item(2, 'تبلت', 500, 650, 30)
+    reloaded.close()
+    assert make_manager(tmp_path).read_item_by_id(2).name == 'تبلت'
+
+
+def test_batch_writes_single_log_record(tmp_path):
+    manager = make_manager(tmp_path)
+    with manager.batch():
+        for i in range(100):
+            manager.create_item(i, f'کالا {i}', 10, 12, 5)
+        for i in range(100):
+            manager.update_item(i, sell_price=15)
+    manager.close()
+
+    with open(tmp_path / 'changes.log', 'rb') as f:
+        records = list(msgpack.Unpacker(f, raw=False))
+    assert len(records) == 1
+    assert make_manager(tmp_path).read_item_by_id(99).sell_price == 15
+
+
+def test_batch_rolls_back_on_error(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    try:
+        with manager.transaction():
+            manager.update_item(1, name='لپ‌تاپ جدید', quantity=1)
+            manager.create_item(2, 'تبلت', 500, 650, 30)
+            manager.create_sale(1, 2, 3, 'مریم', '1402-08-21')
+            raise RuntimeError('خطا در ورود قیمت‌ها')
+    except RuntimeError:
+        pass
+
+    assert manager.read_item_by_id(1).quantity == 50
+    assert manager.read_item_by_name('لپ‌تاپ').id == 1
+    assert manager.read_item_by_name('لپ‌تاپ جدید') is None
+    assert manager.read_item_by_id(2) is None
+    assert manager.read_sale(1) is None
+    manager.close()
+    assert make_manager(tmp_path).read_item_by_id(2) is None
+
+
+def test_group_commit_from_many_threads(tmp_path):
+    manager = DataManager(items_filename=str(tmp_path / 'items.dat'),
+                          sales_filename=str(tmp_path / 'sales.dat'),
+                          log_filename=str(tmp_path / 'changes.log'),
+                          group_commit=True)
+
+    def worker(start):
+        for i in range(start, start + 50):
+            manager.create_item(i, f'کالا {i}', 10, 12, 5)
+
+    threads = [threading.Thread(target=worker, args=(n * 50,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert manager.synced_lsn == manager.written_lsn
+    manager.close()
+    assert len(make_manager(tmp_path).get_all_items()) == 400
+
+
+def test_async_persist_flushes_in_background(tmp_path):
+    manager = make_manager(tmp_path, async_persist=True, flush_interval=60, flush_threshold=10)
+    for i in range(5):
+        manager.create_item(i, f'کالا {i}', 10, 12, 5)
+    manager.update_item(0, quantity=1)
+    manager.update_item(0, quantity=2)
+    # تغییرات پیاپی یک کالا ادغام می‌شوند
+    assert manager.persistence_lag()['dirty'] == 5
+    assert os.path.getsize(tmp_path / 'changes.log') == 0
+
+    for i in range(5, 10):
+        manager.create_item(i, f'کالا {i}', 10, 12, 5)
+    # رسیدن به آستانه، نخ ذخیره‌ساز را بیدار می‌کند
+    for _ in range(100):
+        if manager.persistence_lag()['dirty'] == 0:
+            break
+        time.sleep(0.01)
+    assert manager.persistence_lag()['dirty'] == 0
+    assert os.path.getsize(tmp_path / 'changes.log') > 0
+
+    manager.delete_item(9)
+    manager.close()
+    reloaded = make_manager(tmp_path)
+    assert reloaded.read_item_by_id(0).quantity == 2
+    assert reloaded.read_item_by_id(9) is None
+    assert len(reloaded.get_all_items()) == 9
+
+
+def test_lazy_sales_load_on_first_access(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    manager.create_sale(1, 1, 5, 'علی', '1402-08-20')
+    manager.checkpoint()
+    manager.create_sale(2, 1, 2, 'مریم', '1402-08-21')
+    manager.delete_sale(1)
+    manager.close()
+
+    lazy = make_manager(tmp_path, lazy_sales=True)
+    assert lazy._sales is None
+    assert lazy.read_item_by_id(1).quantity == 48
+    assert lazy.read_sale(2).client == 'مریم'
+    assert lazy.read_sale(1) is None
+    lazy.create_sale(3, 1, 1, 'رضا', '1402-08-22')
+    lazy.close()
+    assert sorted(s.id for s in make_manager(tmp_path).get_all_sales()) == [2, 3]
+
+
+def test_search_items_by_name_index(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ ایسوس', 1000, 1200, 50)
+    manager.create_item(2, 'کیف لپ تاپ', 50, 70, 10)
+    manager.create_item(3, 'گوشی سامسونگ', 300, 400, 100)
+    manager.create_item(4, 'Mouse Logitech', 10, 15, 40)
+
+    # نیم‌فاصله و فاصله یکسان در نظر گرفته می‌شوند
+    assert [item.id for item in manager.search_items_by_name('لپ تاپ')] == [1, 2]
+    assert [item.id for item in manager.search_items_by_name('لپ', mode='prefix')] == [1, 2]
+    assert [item.id for item in manager.search_items_by_name('تاپ', mode='prefix', limit=1)] == [2]
+    # ي و ك عربی با ی و ک فارسی برابرند
+    assert [item.id for item in manager.search_items_by_name('كيف')] == [2]
+    assert [item.id for item in manager.search_items_by_name('LOGI')] == [4]
+
+    manager.update_item(3, name='گوشی شیائومی')
+    assert manager.search_items_by_name('سامسونگ') == []
+    assert [item.id for item in manager.search_items_by_name('شیائو')] == [3]
+    manager.delete_item(1)
+    assert [item.id for item in manager.search_items_by_name('تاپ')] == [2]
+    manager.close()
+
+    reloaded = make_manager(tmp_path)
+    assert [item.id for item in reloaded.search_items_by_name('شیائو')] == [3]
+    reloaded.close()
+
+
+def test_sales_indexes_and_totals(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    manager.create_item(2, 'تبلت', 500, 650, 30)
+    manager.create_sale(1, 1, 2, 'علی', '1403-08-20')
+    manager.create_sale(2, 2, 1, 'علی', '1403-08-21')
+    manager.create_sale(3, 1, 3, 'مریم', '1403-08-21', price=1100)
+    manager.create_sale(4, 2, 4, 'رضا', '1403-08-25')
+
+    assert [sale.id for sale in manager.get_sales_by_item(1)] == [1, 3]
+    assert {sale.id for sale in manager.get_sales_by_client('علی')} == {1, 2}
+    assert {sale.id for sale in manager.get_sales_by_date('1403-08-21')} == {2, 3}
+    assert [sale.id for sale in manager.get_sales_by_date('1403-08-20', '1403-08-24')][0] == 1
+    assert len(manager.get_sales_by_date('1403-08-20', '1403-08-24')) == 3
+    assert manager.sales_totals('item') == {1: (5, 2 * 1200 + 3 * 1100), 2: (5, 650 + 4 * 650)}
+    assert manager.units_sold_per_item() == {1: 5, 2: 5}
+
+    manager.update_sale(4, quantity=1, client='علی')
+    manager.delete_sale(3)
+    assert manager.sales_totals('client') == {'علی': (4, 2400 + 650 + 650)}
+    assert manager.sales_totals('date') == {'1403-08-20': (2, 2400), '1403-08-21': (1, 650),
+                                            '1403-08-25': (1, 650)}
+    manager.close()
+
+    reloaded = make_manager(tmp_path, lazy_sales=True)
+    assert reloaded.sales_totals('client') == {'علی': (4, 2400 + 650 + 650)}
+    assert reloaded.get_sales_by_client('مریم') == []
+    reloaded.close()
+
+
+@pytest.mark.parametrize('lazy_sales', [False, True])
+def test_legacy_sales_are_priced_once(tmp_path, lazy_sales):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    manager.close()
+    # فروش‌های فرمت قدیمی کلید price ندارند؛ کالای فروش دوم دیگر وجود ندارد
+    with open(tmp_path / 'changes.log', 'ab') as log:
+        for sale_id, item_id in ((1, 1), (2, 7)):
+            log.write(msgpack.packb([('sale_put', {'id': sale_id, 'item_id': item_id, 'quantity': 2,
+                                                   'client': 'علی', 'date': '1403-08-20'})]))
+
+    manager = make_manager(tmp_path, lazy_sales=lazy_sales)
+    assert manager.read_sale(1).price == 1200
+    assert manager.sales_totals('item') == {1: (2, 2400), 7: (2, 0)}
+    assert manager.unpriced_sales() == {2}
+    manager.update_item(1, sell_price=1500)
+    manager.close()
+
+    reloaded = make_manager(tmp_path, lazy_sales=lazy_sales)
+    assert reloaded.sales_totals('item') == {1: (2, 2400), 7: (2, 0)}
+    assert reloaded.unpriced_sales() == {2}
+    reloaded.checkpoint()
+    reloaded.close()
+    assert make_manager(tmp_path).read_sale(1).price == 1200
+
+
+def test_snapshot_checksum_detects_corruption(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    manager.checkpoint()
+    manager.close()
+    assert not os.path.exists(tmp_path / 'items.dat.tmp')
+
+    data = bytearray((tmp_path / 'items.dat').read_bytes())
+    data[-3] ^= 0xFF
+    (tmp_path / 'items.dat').write_bytes(bytes(data))
+    with pytest.raises(SnapshotError):
+        make_manager(tmp_path)
+
+
+def test_checkpoint_keeps_changes_written_during_compaction(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    write_snapshot = manager._write_snapshot
+
+    def slow_write_snapshot(filename, records):
+        # تغییری که در حین نوشتن اسنپ‌شات رخ می‌دهد باید در لاگ باقی بماند
+        manager.update_item(1, quantity=7)
+        write_snapshot(filename, records)
+
+    manager._write_snapshot = slow_write_snapshot
+    manager.checkpoint()
+    manager._write_snapshot = write_snapshot
+    assert os.path.getsize(tmp_path / 'changes.log') > 0
+    manager.close()
+    assert make_manager(tmp_path).read_item_by_id(1).quantity == 7
+
+
+def test_background_compaction(tmp_path):
+    manager = make_manager(tmp_path, compact_interval=0.05)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    for _ in range(100):
+        if os.path.exists(tmp_path / 'items.dat'):
+            break
+        time.sleep(0.01)
+    manager.close()
+    assert os.path.getsize(tmp_path / 'changes.log') == 0
+    assert make_manager(tmp_path).read_item_by_id(1).name == 'لپ‌تاپ'
+
+
+def test_log_size_waits_for_log_truncation(tmp_path):
+    manager = make_manager(tmp_path, max_log_size=1)
+    manager.create_item(1, 'لپ‌تاپ', 1000, 1200, 50)
+    errors = []
+
+    def writer():
+        try:
+            manager._maybe_checkpoint()
+        except Exception as e:
+            errors.append(e)
+
+    # وضعیت میانه‌ی _truncate_log: فایل لاگ قبلی بسته شده و فایل جدید هنوز جایگزین نشده
+    with manager.log_lock:
+        log_file = manager.log_file
+        closed = open(tmp_path / 'closed.log', 'ab')
+        closed.close()
+        manager.log_file = closed
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.05)
+        manager.log_file = log_file
+    thread.join()
+    assert errors == []
+    assert os.path.getsize(tmp_path / 'changes.log') == 0
+    manager.close()
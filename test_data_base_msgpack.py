@@ -0,0 +1,89 @@
+import os
+
+import msgpack
+
+import data_base_msgpack
+from data_base_msgpack import ItemManagerMsgPack
+
+
+def test_indexed_msgpack_random_access(tmp_path):
+    filename = str(tmp_path / 'items.dat')
+    manager = ItemManagerMsgPack(filename, indexed=True)
+    manager.items = {str(i): {'id': str(i), 'name': f'کالا {i}', 'buy_price': i, 'sell_price': i * 2,
+                              'quantity': 5} for i in range(1000)}
+    manager.save()
+    manager.create_item('x', 'Laptop', 1000, 1200, 10)
+    manager.update_item('500', quantity=15)
+    manager.delete_item('7')
+    assert manager.delete_item('7') is False
+
+    reader = ItemManagerMsgPack(filename, indexed=True)
+    assert reader.count == 1000
+    assert reader.read_item('500')['quantity'] == 15
+    assert reader.read_item('x')['name'] == 'Laptop'
+    assert reader.read_item('7') is None
+    assert reader.read_item('missing') is None
+    assert len(list(reader.iter_items())) == 1000
+
+
+def test_indexed_msgpack_converts_old_file(tmp_path):
+    filename = tmp_path / 'items.dat'
+    filename.write_bytes(msgpack.packb({'1': {'id': '1', 'name': 'Laptop', 'buy_price': 1000,
+                                              'sell_price': 1200, 'quantity': 10}}))
+    manager = ItemManagerMsgPack(str(filename), indexed=True)
+    assert manager.read_item('1')['name'] == 'Laptop'
+    assert filename.read_bytes()[:4] == b'IMP1'
+
+
+def test_indexed_msgpack_stages_writes_in_a_delta_log(tmp_path):
+    filename = str(tmp_path / 'items.dat')
+    manager = ItemManagerMsgPack(filename, indexed=True, merge_threshold=4)
+    manager.items = {str(i): {'id': str(i), 'name': f'کالا {i}', 'buy_price': i, 'sell_price': i * 2,
+                              'quantity': 5} for i in range(100)}
+    manager.save()
+    indexed = (tmp_path / 'items.dat').read_bytes()
+
+    # نوشتن تک‌کالا فایل اصلی را بازنویسی نمی‌کند
+    manager.create_item('x', 'Laptop', 1000, 1200, 10)
+    manager.update_item('50', quantity=15)
+    manager.delete_item('7')
+    assert (tmp_path / 'items.dat').read_bytes() == indexed
+    reader = ItemManagerMsgPack(filename, indexed=True)
+    assert reader.read_item('50')['quantity'] == 15 and reader.read_item('x')['name'] == 'Laptop'
+    assert reader.read_item('7') is None
+    assert len(list(reader.iter_items())) == 100
+    reader.close()
+
+    # لاگ ناقص (قطع برق هنگام افزودن) نادیده گرفته می‌شود
+    with open(manager.log_filename, 'ab') as f:
+        f.write(msgpack.packb([b'\xa1y', {'id': 'y'}])[:-3])
+    assert ItemManagerMsgPack(filename, indexed=True).read_item('50')['quantity'] == 15
+
+    manager.update_item('50', quantity=16)
+    assert not os.path.exists(manager.log_filename)
+    reader = ItemManagerMsgPack(filename, indexed=True)
+    assert reader.count == 100 and reader.read_item('50')['quantity'] == 16
+
+
+def test_indexed_msgpack_is_durable_before_dropping_the_log(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'items.dat')
+    manager = ItemManagerMsgPack(filename, indexed=True, merge_threshold=2)
+    manager.create_item('1', 'Laptop', 1000, 1200, 10)
+
+    events = []
+    fsync, replace, remove = os.fsync, os.replace, os.remove
+    monkeypatch.setattr(os, 'fsync', lambda fd: (events.append('fsync'), fsync(fd)))
+    monkeypatch.setattr(os, 'replace', lambda *args: (events.append('replace'), replace(*args)))
+    monkeypatch.setattr(os, 'remove', lambda path: (events.append('remove'), remove(path)))
+    monkeypatch.setattr(data_base_msgpack, 'fsync_directory',
+                        lambda path: events.append('fsync_directory'))
+
+    # افزودن به لاگ پیش از بازگشت fsync می‌شود؛ ساخت لاگ جدید پوشه را هم fsync می‌کند
+    manager.update_item('1', quantity=11)
+    assert events == ['fsync', 'fsync_directory']
+
+    # ادغام: fsync فایل جدید، جایگزینی، fsync پوشه و تنها پس از آن حذف لاگ
+    events.clear()
+    manager.update_item('1', quantity=12)
+    assert events == ['fsync', 'fsync', 'replace', 'fsync_directory', 'remove', 'fsync_directory']
+    assert ItemManagerMsgPack(filename, indexed=True).read_item('1')['quantity'] == 12
@@ -0,0 +1,82 @@
+import json
+import os
+
+from data_base_repos import Item, ItemRepository
+
+
+def test_repository_hydrates_lazily_and_writes_only_changes(tmp_path):
+    filename = str(tmp_path / 'items.jsonl')
+    repo = ItemRepository(filename, jsonl=True)
+    repo.items = {str(i): Item(str(i), f'کالا {i}', i, i * 2, 5) for i in range(100)}
+    repo.save()
+
+    repo = ItemRepository(filename, jsonl=True)
+    assert repo.identity == {}
+    item = repo.get_item('5')
+    assert repo.get_item('5') is item
+    assert list(repo.identity) == ['5']
+
+    with open(filename, encoding='utf-8') as f:
+        lines_before = len(f.readlines())
+    repo.update_item('5', quantity=15)
+    repo.delete_item('6')
+    with open(filename, encoding='utf-8') as f:
+        new_lines = [json.loads(line) for line in f.readlines()[lines_before:]]
+    assert new_lines == [{'op': 'put', 'item': {'id': '5', 'name': 'کالا 5', 'buy_price': 5, 'sell_price': 10,
+                                                'quantity': 15}},
+                         {'op': 'del', 'id': '6'}]
+    assert len(repo.identity) == 1
+
+
+def test_repository_unit_of_work(tmp_path):
+    filename = str(tmp_path / 'items.json')
+    repo = ItemRepository(filename, autosave=False)
+    repo.add_item(Item('1', 'Laptop', 1000, 1200, 10))
+    repo.add_item(Item('2', 'Tablet', 500, 650, 3))
+    assert repo.dirty_items() == {'1', '2'}
+    repo.commit()
+    assert repo.dirty_items() == set()
+
+    # تغییر مستقیم شیء برگشتی هم تشخیص داده می‌شود
+    repo.get_item('2').quantity = 1
+    assert repo.dirty_items() == {'2'}
+    repo.delete_item('1')
+    repo.commit()
+
+    reloaded = ItemRepository(filename)
+    assert reloaded.get_item('1') is None
+    assert reloaded.get_item('2').quantity == 1
+
+
+def test_items_mapping_writes_through_to_the_repository(tmp_path):
+    filename = str(tmp_path / 'items.json')
+    repo = ItemRepository(filename)
+    repo.items['2'] = Item('2', 'Mouse', 5, 7, 3)
+    repo.items['3'] = Item('3', 'Keyboard', 8, 10, 2)
+    del repo.items['3']
+    assert list(repo.items) == ['2'] and repo.items['2'].name == 'Mouse'
+    repo.save()
+    assert list(ItemRepository(filename).items) == ['2']
+
+
+def test_plain_json_changes_go_to_a_journal(tmp_path):
+    filename = str(tmp_path / 'items.json')
+    repo = ItemRepository(filename, compact_threshold=3)
+    repo.items = {str(i): Item(str(i), f'کالا {i}', i, i * 2, 5) for i in range(100)}
+    repo.save()
+    with open(filename, encoding='utf-8') as f:
+        snapshot = f.read()
+
+    # به‌روزرسانی و حذف فقط یک خط به ژورنال اضافه می‌کنند، نه بازنویسی کل فایل
+    repo.update_item('5', quantity=15)
+    repo.delete_item('6')
+    with open(filename, encoding='utf-8') as f:
+        assert f.read() == snapshot
+    reloaded = ItemRepository(filename)
+    assert reloaded.get_item('5').quantity == 15 and reloaded.get_item('6') is None
+
+    repo.update_item('7', quantity=1)
+    assert not os.path.exists(repo.journal_filename)
+    with open(filename, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['5']['quantity'] == 15 and data['7']['quantity'] == 1 and '6' not in data
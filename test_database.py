@@ -0,0 +1,55 @@
+import subprocess
+import sys
+
+import pytest
+
+from database import DatabaseManager, DuplicateItemError
+
+
+def test_database_manager_runs_without_a_display():
+    db = DatabaseManager(':memory:')
+    assert db.insert_item_db(('لپ‌تاپ ایسوس', 100.0, 120.0, 5))
+    item_id = db.search_items_db('ایسوس')[0][-1]
+    assert db.insert_sale_db((item_id, 2, 'علی', '1403-08-01'))
+    assert db.get_sales_data() == [('لپ‌تاپ ایسوس', 2)]
+    assert db.get_inventory_data() == [('لپ‌تاپ ایسوس', 5)]
+    assert db.update_item_db(item_id, ('لپ‌تاپ ایسوس', 100.0, 130.0, 3))
+    assert db.get_inventory_data() == [('لپ‌تاپ ایسوس', 3)]
+    assert [record['sell_price'] for record in db.export_items_db()] == [130.0]
+    db.insert_item_db(('ماوس', 1.0, 2.0, 4))
+    assert [row[3] for row in db.list_items_db(limit=1)] == ['لپ‌تاپ ایسوس']
+    assert [row[3] for row in db.list_items_db(after=item_id)] == ['ماوس']
+    db.close_connection()
+
+
+def test_duplicate_name_raises_instead_of_showing_a_dialog():
+    db = DatabaseManager(':memory:')
+    db.insert_item_db(('ماوس', 1.0, 2.0, 1))
+    db.insert_item_db(('کیبورد', 1.0, 2.0, 1))
+    with pytest.raises(DuplicateItemError) as error:
+        db.insert_item_db(('ماوس', 3.0, 4.0, 1))
+    assert error.value.name == 'ماوس'
+    keyboard_id = db.search_items_db('کیبورد')[0][-1]
+    with pytest.raises(DuplicateItemError):
+        db.update_item_db(keyboard_id, ('ماوس', 1.0, 2.0, 1))
+    assert {name for name, _ in db.retrieve_item_list_db()} == {'کیبورد', 'ماوس'}
+    db.close_connection()
+
+
+def test_importing_the_data_layer_loads_no_gui_modules():
+    # utils هم فقط لایهٔ داده را بارگذاری می‌کند؛ UIF تا اولین استفاده وارد نمی‌شود
+    code = ('import sys, utils, database; '
+            'print(sorted(m for m in ("tkinter", "ttkbootstrap", "matplotlib", "ui") if m in sys.modules))')
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
+
+
+if __name__ == '__main__':
+    # Start-up cost of each entry point, every one measured in a fresh interpreter.
+    for module in ('database', 'utils', 'ui'):
+        code = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        if result.returncode:
+            print(f'import {module:<8}  unavailable ({result.stderr.strip().splitlines()[-1]})')
+        else:
+            print(f'import {module:<8}  {float(result.stdout) * 1000:8.1f} ms')
@@ -0,0 +1,44 @@
+import os
+
+import jsonl_store
+from data_base_json import ItemManagerJSON
+from data_base_repos import Item, ItemRepository
+
+
+def test_item_manager_json_lines_mode(tmp_path):
+    filename = str(tmp_path / 'items.jsonl')
+    manager = ItemManagerJSON(filename, jsonl=True)
+    manager.create_item('1', 'لپ‌تاپ', 1000, 1200, 10)
+    manager.create_item('2', 'تبلت', 500, 650, 3)
+    manager.update_item('1', quantity=15)
+    manager.delete_item('2')
+    with open(filename, encoding='utf-8') as f:
+        assert len(f.readlines()) == 4
+
+    reloaded = ItemManagerJSON(filename, jsonl=True)
+    assert reloaded.items == {'1': {'id': '1', 'name': 'لپ‌تاپ', 'buy_price': 1000, 'sell_price': 1200,
+                                    'quantity': 15}}
+    jsonl_store.compact(filename)
+    with open(filename, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+    assert ItemManagerJSON(filename, jsonl=True).items == reloaded.items
+
+
+def test_item_repository_json_lines_mode(tmp_path):
+    filename = str(tmp_path / 'items.jsonl')
+    repo = ItemRepository(filename, jsonl=True)
+    repo.add_item(Item('1', 'Laptop', 1000, 1200, 10))
+    repo.update_item('1', quantity=15)
+    size = os.path.getsize(filename)
+    # سطر نیمه‌کاره‌ی انتهای فایل نادیده گرفته می‌شود
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write('{"op":"del","id":')
+
+    reloaded = ItemRepository(filename, jsonl=True)
+    assert reloaded.get_item('1').quantity == 15
+    assert os.path.getsize(filename) == size
+    reloaded.update_item('1', quantity=16)
+    assert ItemRepository(filename, jsonl=True).get_item('1').quantity == 16
+    reloaded.compact()
+    assert os.path.getsize(filename) < size
+    assert ItemRepository(filename, jsonl=True).get_item('1').name == 'Laptop'
@@ -0,0 +1,58 @@
+from database import DatabaseManager
+from lru_cache import LRUCache
+
+
+def test_least_recently_used_key_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.get('a', lambda: 1)
+    cache.get('b', lambda: 2)
+    cache.get('a', lambda: 0)
+    cache.get('c', lambda: 3)
+    assert list(cache.values) == ['a', 'c']
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2, 'maxsize': 2}
+
+
+def test_value_loaded_during_an_invalidation_is_not_kept():
+    cache = LRUCache()
+
+    def load():
+        cache.invalidate('other')
+        return 'stale'
+
+    assert cache.get('a', load) == 'stale'
+    assert cache.get('a', lambda: 'fresh') == 'fresh'
+
+
+def test_item_lookups_are_cached_and_invalidated_by_mutations():
+    db = DatabaseManager(':memory:', item_cache_size=8)
+    # شناسه‌ای که هنوز وجود ندارد هم در حافظه می‌ماند و درج باید آن را باطل کند
+    assert db.search_items_db_by_id(1) == []
+    db.insert_item_db(('مانیتور', 10.0, 12.0, 4))
+    assert db.search_items_db_by_id(1) == [(4, 12.0, 10.0, 'مانیتور', 1)]
+    assert db.retrieve_item_list_db() == [('مانیتور', 1)]
+    hits = db.item_cache_stats()['hits']
+    db.search_items_db_by_id(1)
+    db.retrieve_item_list_db()
+    assert db.item_cache_stats()['hits'] == hits + 2
+
+    db.update_item_db(1, ('مانیتور ال‌جی', 10.0, 13.0, 3))
+    assert db.search_items_db_by_id(1) == [(3, 13.0, 10.0, 'مانیتور ال‌جی', 1)]
+    assert db.retrieve_item_list_db() == [('مانیتور ال‌جی', 1)]
+    db.delete_item_db(1)
+    assert db.search_items_db_by_id(1) == []
+    assert db.retrieve_item_list_db() == []
+    db.import_items_db([{'id': 1, 'name': 'هدفون', 'buy_price': 1.0, 'sell_price': 2.0, 'quantity': 1}])
+    assert db.search_items_db_by_id(1)[0][3] == 'هدفون'
+    db.close_connection()
+
+
+def test_string_and_int_ids_share_one_cache_entry():
+    db = DatabaseManager(':memory:')
+    db.insert_item_db(('پرینتر', 10.0, 12.0, 3))
+    # Treeview شناسه را رشته می‌دهد و فرم ویرایش عدد
+    assert db.search_items_db_by_id('1')[0][0] == 3
+    db.update_item_db(1, ('پرینتر', 10.0, 12.0, 99))
+    assert db.search_items_db_by_id('1')[0][0] == 99
+    db.delete_item_db('1')
+    assert db.search_items_db_by_id(1) == []
+    db.close_connection()
@@ -0,0 +1,59 @@
+import gc
+import sys
+import tracemalloc
+
+from data_base_fast import Item, Sale
+
+
+# نسخه‌ی قبلی کلاس‌ها (با __dict__ برای هر نمونه) برای مقایسه
+class DictItem:
+    def __init__(self, item_id, name, buy_price, sell_price, quantity):
+        self.id = item_id
+        self.name = name
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        self.quantity = quantity
+
+
+class DictSale:
+    def __init__(self, sale_id, item_id, quantity, client, date):
+        self.id = sale_id
+        self.item_id = item_id
+        self.quantity = quantity
+        self.client = client
+        self.date = date
+
+
+def measure(factory, count):
+    # حافظه‌ی مصرفی برای ساخت count رکورد در یک دیکشنری مانند DataManager
+    gc.collect()
+    tracemalloc.start()
+    records = {i: factory(i) for i in range(count)}
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def sale_factory(cls):
+    return lambda i: cls(i, i % 1000, 1, 'علی', '1403-08-20')
+
+
+def item_factory(cls):
+    return lambda i: cls(i, 'کالا', 1000.0, 1200.0, 5)
+
+
+def test_slots_records_are_smaller():
+    assert not hasattr(Sale(1, 1, 1, 'علی', '1403-08-20'), '__dict__')
+    assert measure(sale_factory(Sale), 10000) < measure(sale_factory(DictSale), 10000)
+    assert measure(item_factory(Item), 10000) < measure(item_factory(DictItem), 10000)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for label, old, new in (('Sale', sale_factory(DictSale), sale_factory(Sale)),
+                            ('Item', item_factory(DictItem), item_factory(Item))):
+        old_size = measure(old, count)
+        new_size = measure(new, count)
+        print(f'{label} x {count:,}: __dict__ {old_size / 2 ** 20:8.1f} MiB   '
+              f'__slots__ {new_size / 2 ** 20:8.1f} MiB   ({new_size / old_size:.0%})')
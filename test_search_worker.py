@@ -0,0 +1,72 @@
+import time
+
+from search_worker import SearchWorker
+from sqlite_pool import ConnectionPool
+from storage import ITEMS_TABLE
+
+# پرس‌وجوی کند: شمارش تا n با CTE بازگشتی، تا بتوان آن را در میانه‌ی اجرا لغو کرد
+SLOW_QUERY = '''
+    WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter WHERE n < ?)
+    SELECT name FROM items WHERE (SELECT MAX(n) FROM counter) > 0 AND name LIKE ?
+'''
+
+
+def wait_for_result(worker, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ready, rows = worker.poll()
+        if ready:
+            return rows
+        time.sleep(0.005)
+    raise AssertionError('no result')
+
+
+def test_only_the_newest_query_is_delivered_and_stale_ones_are_interrupted():
+    pool = ConnectionPool(':memory:')
+    with pool.transaction() as conn:
+        conn.execute(ITEMS_TABLE)
+        conn.executemany('INSERT INTO items (name, buy_prc, sel_prc, quantity) VALUES (?, 1, 2, 3)',
+                         [('لپ‌تاپ',), ('کیف',), ('گوشی',)])
+    started = []
+    finished = []
+
+    def search(value):
+        started.append(value)
+        rows = pool.connection().execute(SLOW_QUERY, (10 ** 8 if value == 'کند' else 1, f'%{value}%')).fetchall()
+        finished.append(value)
+        return rows
+
+    worker = SearchWorker(search, pool.connection)
+    worker.submit('کند')
+    while not started:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    start = time.monotonic()
+    for value in ('ک', 'کی', 'کیف'):
+        worker.submit(value)
+    assert wait_for_result(worker) == [('کیف',)]
+    assert time.monotonic() - start < 2  # the slow query was interrupted, not waited for
+    assert 'کند' not in finished
+    assert finished[-1] == 'کیف'
+    assert worker.poll() == (False, None)
+    worker.close()
+    worker.thread.join()
+    pool.close()
+
+
+def test_errors_are_raised_from_poll():
+    def search(value):
+        raise ValueError(value)
+
+    worker = SearchWorker(search)
+    worker.submit('x')
+    deadline = time.monotonic() + 5
+    while worker.pending() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    try:
+        worker.poll()
+    except ValueError as e:
+        assert str(e) == 'x'
+    else:
+        raise AssertionError('error was not raised')
+    worker.close()
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import pytest
+
+from sqlite_pool import ConnectionPool, bulk_insert, iter_rows
+from storage import ITEMS_TABLE
+
+ITEM_COUNT = 1000
+
+
+def run_stress(reader_count, duration=0.5, **pragmas):
+    # خواننده‌ها کالاها را بر اساس id می‌خوانند و یک نویسنده همزمان قیمت‌ها را تغییر می‌دهد
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = ConnectionPool(os.path.join(tmp_dir, 'items.db'), **pragmas)
+        with pool.transaction() as conn:
+            conn.execute(ITEMS_TABLE)
+            conn.executemany('INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (?,?,?,?,?)',
+                             ((i, f'کالا {i}', i, i * 2, 100) for i in range(ITEM_COUNT)))
+
+        stop = threading.Event()
+        reads = [0] * reader_count
+        writes = [0]
+        errors = []
+
+        def reader(index):
+            count = 0
+            try:
+                cursor = pool.cursor()
+                while not stop.is_set():
+                    for i in range(0, ITEM_COUNT, 7):
+                        cursor.execute('SELECT buy_prc, sel_prc FROM items WHERE id=?', (i,))
+                        buy_price, sell_price = cursor.fetchone()
+                        if sell_price != buy_price * 2:
+                            errors.append((i, buy_price, sell_price))
+                        count += 1
+            except Exception as e:
+                errors.append(e)
+            reads[index] = count
+
+        def writer():
+            n = 0
+            try:
+                while not stop.is_set():
+                    with pool.transaction() as conn:
+                        conn.execute('UPDATE items SET buy_prc=?, sel_prc=? WHERE id=?', (n, n * 2, n % ITEM_COUNT))
+                    n += 1
+            except Exception as e:
+                errors.append(e)
+            writes[0] = n
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(reader_count)]
+        threads.append(threading.Thread(target=writer))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        pool.close()
+        return sum(reads) / elapsed, writes[0] / elapsed, errors
+
+
+def test_pool_gives_each_thread_a_tuned_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'items.db'), synchronous='OFF', cache_size=-1000)
+    conn = pool.connection()
+    assert pool.connection() is conn
+    assert conn.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    assert conn.execute('PRAGMA synchronous').fetchone() == (0,)
+    assert conn.execute('PRAGMA cache_size').fetchone() == (-1000,)
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+    pool.close()
+
+
+def test_connections_are_closed_when_their_thread_exits(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'items.db'))
+    opened = []
+    threads = [threading.Thread(target=lambda: opened.append(pool.connection())) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 20 and len(pool.connections) == 0
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+    # close_all همه‌ی اتصال‌ها را می‌بندد و نخ در استفاده‌ی بعدی اتصال تازه می‌گیرد
+    conn = pool.connection()
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+    assert pool.connection() is not conn
+    assert pool.cursor().execute('SELECT 1').fetchone() == (1,)
+    pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.connection()
+
+
+def test_memory_database_is_shared_between_threads():
+    pool = ConnectionPool(':memory:')
+    with pool.transaction() as conn:
+        conn.execute(ITEMS_TABLE)
+        conn.execute("INSERT INTO items (name, buy_prc, sel_prc, quantity) VALUES ('Laptop', 1000, 1200, 10)")
+    rows = []
+    thread = threading.Thread(target=lambda: rows.extend(pool.connection().execute('SELECT name FROM items')))
+    thread.start()
+    thread.join()
+    assert rows == [('Laptop',)]
+    pool.close()
+
+
+def test_readers_run_alongside_a_writer():
+    read_throughput, write_throughput, errors = run_stress(4, duration=0.3)
+    assert not errors
+    assert read_throughput > 0 and write_throughput > 0
+
+
+def test_bulk_insert_rejects_bad_rows_without_aborting():
+    pool = ConnectionPool(':memory:')
+    conn = pool.connection()
+    conn.execute(ITEMS_TABLE)
+    rows = [(None, f'کالا {i % 900}', i, i * 2, 5) for i in range(1000)]
+    rows.append((None, 'بی‌قیمت', None, 1, 1))
+    query = 'INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (?,?,?,?,?)'
+    inserted, rejected = bulk_insert(conn, query, iter(rows), chunk_size=128)
+    assert inserted == 900
+    assert len(rejected) == 101
+    assert rejected[0][0] == (None, 'کالا 0', 900, 1800, 5) and 'UNIQUE' in rejected[0][1]
+    assert 'NOT NULL' in rejected[-1][1]
+    names = [name for name, in iter_rows(conn, 'SELECT name FROM items ORDER BY id', size=64)]
+    assert names == [f'کالا {i}' for i in range(900)]
+    pool.close()
+
+
+if __name__ == '__main__':
+    # توان عملیاتی خواندن در حضور یک نویسنده، با WAL و با ژورنال پیش‌فرض
+    for label, pragmas in (('wal', {}), ('rollback', {'wal': False, 'synchronous': 'FULL'})):
+        for reader_count in (1, 2, 4, 8):
+            reads, writes, errors = run_stress(reader_count, duration=2, **pragmas)
+            print(f'{label:<8} readers={reader_count:2d}  reads/sec={reads:12,.0f}  '
+                  f'writes/sec={writes:10,.0f}  errors={len(errors)}')
@@ -0,0 +1,81 @@
+import random
+import sqlite3
+
+from sqlite_migrations import MIGRATIONS, migrate, schema_version
+from sqlite_reports import client_sales, page_key, sales_between
+from storage import ITEMS_TABLE, SALES_TABLE
+
+
+def make_database():
+    rng = random.Random(0)
+    conn = sqlite3.connect(':memory:')
+    conn.execute(ITEMS_TABLE)
+    conn.execute(SALES_TABLE)
+    conn.executemany('INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (?,?,?,?,?)',
+                     ((i, f'کالا {i}', i, i * 2, 5) for i in range(10)))
+    conn.executemany('INSERT INTO sales (item_id, quantity, client, date) VALUES (?,?,?,?)',
+                     ((rng.randrange(10), 1, rng.choice(['علی', 'رضا', 'مریم']),
+                       f'14{rng.randrange(0, 4):02d}-{rng.randrange(1, 13):02d}-01') for _ in range(1000)))
+    conn.commit()
+    return conn
+
+
+def all_pages(query, *args):
+    rows, after = [], None
+    while True:
+        page = query(*args, after=after, limit=37)
+        rows.extend(page)
+        if len(page) < 37:
+            return rows
+        after = page_key(page)
+
+
+def test_migrations_create_sales_indexes_once():
+    conn = make_database()
+    assert schema_version(conn) == 0
+    assert migrate(conn) == len(MIGRATIONS)
+    assert migrate(conn) == len(MIGRATIONS)
+    indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'sales_item_id', 'sales_date', 'sales_client'} <= indexes
+
+
+def test_keyset_pages_cover_the_range_in_order():
+    conn = make_database()
+    migrate(conn)
+    expected = conn.execute("SELECT id, date FROM sales WHERE date BETWEEN '1401-01-01' AND '1402-06-01' "
+                            "ORDER BY date, id").fetchall()
+    rows = all_pages(sales_between, conn, '1401-01-01', '1402-06-01')
+    assert [(row[0], row[1]) for row in rows] == expected
+    assert rows[0][3] == f'کالا {rows[0][2]}'
+
+    expected = conn.execute("SELECT id FROM sales WHERE client = 'مریم' ORDER BY date, id").fetchall()
+    assert [(row[0],) for row in all_pages(client_sales, conn, 'مریم')] == expected
+
+
+def query_plans(conn, query, *args, **kwargs):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    rows = query(conn, *args, **kwargs)
+    conn.set_trace_callback(None)
+    return rows, [str(conn.execute('EXPLAIN QUERY PLAN ' + statement).fetchall()) for statement in statements]
+
+
+def test_pages_inside_one_busy_date_seek_by_id():
+    conn = make_database()
+    migrate(conn)
+    conn.executemany('INSERT INTO sales (item_id, quantity, client, date) VALUES (?,?,?,?)',
+                     ((1, 1, 'علی', '1402-05-05') for _ in range(5000)))
+    expected = conn.execute("SELECT id FROM sales WHERE date BETWEEN '1402-05-05' AND '1403-01-01' "
+                            "ORDER BY date, id").fetchall()
+    assert [(row[0],) for row in all_pages(sales_between, conn, '1402-05-05', '1403-01-01')] == expected
+    expected = conn.execute("SELECT id FROM sales WHERE client = 'علی' ORDER BY date, id").fetchall()
+    assert [(row[0],) for row in all_pages(client_sales, conn, 'علی')] == expected
+
+    # صفحه‌ای در میانه‌ی یک روز شلوغ: جستجو روی (date, rowid)، بدون پیمایش ردیف‌های قبلی آن روز
+    after = conn.execute("SELECT date, id FROM sales WHERE date = '1402-05-05' ORDER BY id "
+                         "LIMIT 1 OFFSET 4000").fetchone()
+    rows, plans = query_plans(conn, sales_between, '1402-05-05', '1403-01-01', after=after, limit=10)
+    assert rows[0][0] > after[1] and len(rows) == 10
+    assert 'sales_date (date=? AND rowid>?)' in plans[0] and 'TEMP B-TREE' not in str(plans)
+    rows, plans = query_plans(conn, client_sales, 'علی', after=after, limit=10)
+    assert 'sales_client (client=? AND date=? AND rowid>?)' in plans[0] and 'TEMP B-TREE' not in str(plans)
@@ -0,0 +1,118 @@
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+
+from sqlite_search import NAME_KEY, create_search_index, search_items
+from storage import ITEMS_TABLE
+
+COLUMNS = 'items.id, items.name'
+
+
+def make_database(count, seed=0):
+    rng = random.Random(seed)
+    words = ['کالا', 'لپ‌تاپ', 'گوشی', 'کیف', 'Laptop', 'Phone', 'یخچال', 'کتاب']
+    conn = sqlite3.connect(':memory:')
+    conn.execute(ITEMS_TABLE)
+    conn.executemany('INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (?,?,?,?,?)',
+                     ((i, f'{rng.choice(words)} {rng.choice(words)} {i}', i, i * 2, 5) for i in range(count)))
+    conn.commit()
+    return conn
+
+
+def test_search_index_is_kept_in_sync_by_triggers():
+    conn = make_database(0)
+    assert create_search_index(conn)
+    with conn:
+        conn.execute("INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (1, 'لپ‌تاپ ایسوس', 1, 2, 3)")
+        conn.execute("INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (2, 'کیف لپ‌تاپ', 1, 2, 3)")
+        conn.execute("INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (3, 'Laptop Bag', 1, 2, 3)")
+    # ي و ك عربی و نیم‌فاصله‌ی جاافتاده همان نام فارسی را پیدا می‌کنند
+    assert search_items(conn, 'لپ تاپ', COLUMNS) == [(1, 'لپ‌تاپ ایسوس'), (2, 'کیف لپ‌تاپ')]
+    assert search_items(conn, 'كيف', COLUMNS) == [(2, 'کیف لپ‌تاپ')]
+    assert search_items(conn, 'laptop', COLUMNS) == [(3, 'Laptop Bag')]
+    assert search_items(conn, 'تاپ', COLUMNS, limit=1) == [(2, 'کیف لپ‌تاپ')]
+    assert search_items(conn, 'لپ‌تاپ', COLUMNS, limit=1) == [(1, 'لپ‌تاپ ایسوس')]
+    assert search_items(conn, 'پ', COLUMNS) == [(1, 'لپ‌تاپ ایسوس'), (2, 'کیف لپ‌تاپ')]
+
+    with conn:
+        conn.execute("UPDATE items SET name = 'کیف چرمی' WHERE id = 2")
+        conn.execute('DELETE FROM items WHERE id = 1')
+    assert search_items(conn, 'لپ‌تاپ', COLUMNS) == []
+    assert search_items(conn, 'چرم', COLUMNS) == [(2, 'کیف چرمی')]
+
+
+def test_search_index_is_built_for_existing_items():
+    conn = make_database(2000)
+    expected = [row for row in conn.execute(f"SELECT {COLUMNS} FROM items WHERE name LIKE '%گوشی کیف%'")]
+    assert create_search_index(conn)
+    found = search_items(conn, 'گوشی کیف', COLUMNS)
+    assert sorted(found) == sorted(expected)
+    # نام‌هایی که با عبارت شروع می‌شوند اول می‌آیند
+    assert found[0][1].startswith('گوشی کیف')
+    assert sorted(search_items(conn, "گوشی کیف", COLUMNS, fts=False)) == sorted(expected)
+
+
+def test_limited_search_reads_prefix_matches_from_the_index():
+    conn = make_database(3000)
+    assert create_search_index(conn)
+    plan = conn.execute(f'EXPLAIN QUERY PLAN SELECT id FROM items WHERE {NAME_KEY} >= ? AND {NAME_KEY} < ?',
+                        ('کالا', 'کالا\U0010ffff')).fetchall()
+    assert 'items_name_key' in plan[0][3]
+    # با سقف، نتیجه‌ها همان مجموعه‌ی بدون سقف هستند و نام‌هایی که با عبارت شروع می‌شوند اول می‌آیند
+    everything = search_items(conn, 'کالا', COLUMNS)
+    found = search_items(conn, 'کالا', COLUMNS, limit=50)
+    assert len(found) == 50 and all(name.startswith('کالا') for _, name in found)
+    assert set(found) <= set(everything)
+    # بدون تطابق پیشوندی، نتیجه‌ها از میان نامزدهای محدود به ترتیب طول مرتب می‌شوند
+    found = search_items(conn, 'تاپ', COLUMNS, limit=20)
+    assert len(found) == 20 and set(found) <= set(search_items(conn, 'تاپ', COLUMNS))
+    assert [len(name) for _, name in found] == sorted(len(name) for _, name in found)
+
+
+def test_case_folding_matches_for_every_script():
+    conn = make_database(0)
+    assert create_search_index(conn)
+    with conn:
+        conn.execute("INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (1, 'ÉCRAN Samsung', 1, 2, 3)")
+        conn.execute("INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (2, 'Straße Kabel', 1, 2, 3)")
+        conn.execute("INSERT INTO items (id, name, buy_prc, sel_prc, quantity) VALUES (3, 'گوشی ۱۲۳', 1, 2, 3)")
+    for limit in (None, 10):
+        assert search_items(conn, 'écran', COLUMNS, limit=limit) == [(1, 'ÉCRAN Samsung')]
+        assert search_items(conn, 'STRASSE', COLUMNS, limit=limit) == [(2, 'Straße Kabel')]
+        # ارقام فارسی و لاتین هم یکسان می‌شوند
+        assert search_items(conn, 'گوشی 123', COLUMNS, limit=limit) == [(3, 'گوشی ۱۲۳')]
+    assert search_items(conn, 'é', COLUMNS) == [(1, 'ÉCRAN Samsung')]
+
+
+def test_index_built_with_replace_normalization_is_rebuilt():
+    conn = make_database(10)
+    conn.execute("CREATE VIRTUAL TABLE items_fts USING fts5(name, tokenize='trigram')")
+    conn.execute("CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN "
+                 "INSERT INTO items_fts(rowid, name) VALUES (new.id, replace(new.name, 'x', 'y')); END")
+    conn.execute("CREATE INDEX items_name_prefix ON items(lower(name))")
+    assert create_search_index(conn)
+    objects = {name for name, in conn.execute('SELECT name FROM sqlite_master')}
+    assert 'items_name_prefix' not in objects and {'items_name_key', 'items_fts_update'} <= objects
+    assert len(search_items(conn, 'کالا', COLUMNS) + search_items(conn, 'Laptop', COLUMNS)) > 0
+
+
+def test_search_layer_does_not_import_data_manager():
+    code = 'import sys, sqlite_search; print("data_base_fast" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
+
+if __name__ == '__main__':
+    # زمان جستجو در یک میلیون کالا، با FTS5 و با LIKE
+    conn = make_database(1000000)
+    start = time.perf_counter()
+    create_search_index(conn)
+    print(f'index build: {time.perf_counter() - start:.1f}s')
+    for query in ('کالا', 'تاپ', '999999', 'لپ‌تاپ 12345', 'كيف 4321', 'Phone 77', 'کتاب یخچال 5'):
+        for fts in (True, False):
+            start = time.perf_counter()
+            rows = search_items(conn, query, COLUMNS, limit=50, fts=fts)
+            print(f'{"fts" if fts else "like":<5} {query!r:<16} rows={len(rows):3d}  '
+                  f'{(time.perf_counter() - start) * 1000:8.2f} ms')
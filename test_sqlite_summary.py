@@ -0,0 +1,50 @@
+import random
+import sqlite3
+
+from sqlite_summary import create_sales_summary, rebuild_sales_summary
+from storage import ITEMS_TABLE, SALES_TABLE
+
+
+def aggregates(conn):
+    by_item = conn.execute('SELECT item_id, SUM(quantity), COUNT(*) FROM sales GROUP BY item_id').fetchall()
+    by_day = conn.execute('SELECT date, SUM(quantity), COUNT(*) FROM sales GROUP BY date').fetchall()
+    return by_item, by_day
+
+
+def summaries(conn):
+    return (conn.execute('SELECT item_id, quantity, sales FROM sales_by_item ORDER BY item_id').fetchall(),
+            conn.execute('SELECT date, quantity, sales FROM sales_by_day ORDER BY date').fetchall())
+
+
+def test_triggers_keep_summaries_equal_to_aggregates():
+    rng = random.Random(0)
+    conn = sqlite3.connect(':memory:')
+    conn.execute(ITEMS_TABLE)
+    conn.execute(SALES_TABLE)
+    # فروش‌های قبل از ساخت جدول‌های خلاصه باید در اولین اجرا محاسبه شوند
+    conn.executemany('INSERT INTO sales (item_id, quantity, client, date) VALUES (?,?,?,?)',
+                     ((rng.randrange(20), rng.randrange(1, 5), 'علی', f'1403-08-{rng.randrange(1, 10):02d}')
+                      for _ in range(200)))
+    create_sales_summary(conn)
+    assert summaries(conn) == aggregates(conn)
+
+    for _ in range(500):
+        action = rng.random()
+        with conn:
+            if action < 0.5:
+                conn.execute('INSERT INTO sales (item_id, quantity, client, date) VALUES (?,?,?,?)',
+                             (rng.randrange(20), rng.randrange(1, 5), 'رضا', f'1403-08-{rng.randrange(1, 10):02d}'))
+            elif action < 0.8:
+                conn.execute('UPDATE sales SET item_id=?, quantity=?, date=? WHERE id=?',
+                             (rng.randrange(20), rng.randrange(1, 5), f'1403-09-{rng.randrange(1, 3):02d}',
+                              rng.randrange(1, 400)))
+            else:
+                conn.execute('DELETE FROM sales WHERE id=?', (rng.randrange(1, 400),))
+    assert summaries(conn) == aggregates(conn)
+
+    conn.execute('DELETE FROM sales_by_day')
+    rebuild_sales_summary(conn)
+    assert summaries(conn) == aggregates(conn)
+    with conn:
+        conn.execute('DELETE FROM sales')
+    assert summaries(conn) == ([], [])
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import storage
+from data_base_fast import DataManager
+
+
+def sample_records(count):
+    return [{'id': i, 'name': f'کالا {i}', 'buy_price': i, 'sell_price': i * 2, 'quantity': 5}
+            for i in range(1, count + 1)]
+
+
+def engine_path(tmp_path, name):
+    return str(tmp_path / {'csv': 'items.csv', 'json': 'items.json', 'repository': 'items.jsonl',
+                           'msgpack': 'items.dat', 'msgpack-indexed': 'indexed.dat',
+                           'datamanager': 'fast', 'sqlite': 'items.db'}[name])
+
+
+@pytest.mark.parametrize('name', sorted(storage.ENGINES))
+def test_engine_round_trip(tmp_path, name):
+    path = engine_path(tmp_path, name)
+    with storage.open_engine(name, path) as engine:
+        assert engine.write_records(iter(sample_records(50))) == 50
+
+    with storage.open_engine(name, path) as engine:
+        records = sorted(engine.iter_records(), key=lambda record: int(record['id']))
+        assert [record['name'] for record in records] == [f'کالا {i}' for i in range(1, 51)]
+        assert records[0]['sell_price'] == 2
+        item_id = records[9]['id']
+        engine.put(dict(records[9], quantity=7))
+        assert engine.get(item_id)['quantity'] == 7
+        assert engine.delete(records[10]['id'])
+        assert engine.get(records[10]['id']) is None
+
+    with storage.open_engine(name, path) as engine:
+        records = list(engine.iter_records())
+        assert len(records) == 49
+        assert [record['quantity'] for record in records if record['id'] == item_id] == [7]
+
+
+def test_convert_streams_json_into_sqlite(tmp_path):
+    source = str(tmp_path / 'items.json')
+    with open(source, 'w', encoding='utf-8') as f:
+        json.dump({str(r['id']): dict(r, id=str(r['id'])) for r in sample_records(300)}, f,
+                  indent=4, ensure_ascii=False)
+    members = list(storage.iter_json_object(source, chunk_size=7))
+    assert len(members) == 300 and members[0] == ('1', {'id': '1', 'name': 'کالا 1', 'buy_price': 1,
+                                                      'sell_price': 2, 'quantity': 5})
+
+    target = str(tmp_path / 'items.db')
+    assert storage.main(['convert', 'json', source, 'sqlite', target]) == 300
+    with storage.open_engine('sqlite', target) as engine:
+        assert engine.get(300) == {'id': 300, 'name': 'کالا 300', 'buy_price': 300, 'sell_price': 600,
+                                   'quantity': 5}
+
+    # The streaming JSON writer produces the same file as json.dump.
+    copy = str(tmp_path / 'copy.json')
+    storage.main(['convert', 'sqlite', target, 'json', copy])
+    with open(source, encoding='utf-8') as a, open(copy, encoding='utf-8') as b:
+        assert json.load(a) == json.load(b)
+
+
+def test_iter_sales_applies_the_change_log(tmp_path):
+    manager = DataManager(*(str(tmp_path / name) for name in ('items.dat', 'sales.dat', 'changes.log')), sync=False)
+    manager.create_item(1, 'Laptop', 1000, 1200, 100)
+    for sale_id in range(1, 6):
+        manager.create_sale(sale_id, 1, 1, 'علی', '1403-08-20')
+    manager.checkpoint()
+    manager.update_sale(2, client='رضا')
+    manager.delete_sale(3)
+    manager.create_sale(6, 1, 2, 'مریم', '1403-08-21')
+    manager.close()
+
+    sales = {sale['id']: sale for sale in storage.iter_sales(str(tmp_path))}
+    assert sorted(sales) == [1, 2, 4, 5, 6]
+    assert sales[2]['client'] == 'رضا'
+    assert storage.sqlite_sale_row(sales[6]) == (6, 1, 2, 'مریم', '1403-08-21')
+
+
+def test_blank_csv_cells_and_json_ids_convert(tmp_path):
+    source = tmp_path / 'items.csv'
+    source.write_text('id,name,buy_price,sell_price,quantity\r\n1,Laptop,1000,,10\r\n2,Mouse,5,7,\r\n',
+                      encoding='utf-8')
+    # خانه‌ی خالی قیمت یا موجودی تبدیل را متوقف نمی‌کند
+    records = list(storage.open_engine('csv', str(source)).iter_records())
+    assert records[0]['sell_price'] is None and records[1]['quantity'] is None
+
+    # SQLite rejects blank cells (NOT NULL); those rows are skipped and listed
+    with storage.open_engine('sqlite', str(tmp_path / 'items.db')) as engine:
+        assert engine.write_records(iter(records)) == 0
+        assert [reason for _, reason in engine.rejected] == ['blank sell_price', 'blank quantity']
+
+    json_source = str(tmp_path / 'items.json')
+    storage.main(['convert', 'csv', str(source), 'json', json_source])
+    target = str(tmp_path / 'fast')
+    assert storage.main(['convert', 'json', json_source, 'datamanager', target]) == 2
+    with storage.open_engine('datamanager', target) as engine:
+        assert sorted(record['id'] for record in engine.iter_records()) == [1, 2]
+        assert engine.get('2')['name'] == engine.get(2)['name'] == 'Mouse'
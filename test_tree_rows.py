@@ -0,0 +1,106 @@
+import random
+
+from tree_rows import TreeRows
+
+
+class RecordingTree:
+    # همان بخشی از رابط ttk.Treeview که TreeRows استفاده می‌کند، همراه با شمارش عملیات
+    def __init__(self):
+        self.rows = []
+        self.values = {}
+        self.calls = []
+
+    def insert(self, parent, index, iid, values):
+        self.rows.insert(len(self.rows) if index == 'end' else index, iid)
+        self.values[iid] = values
+        self.calls.append('insert')
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.rows.remove(iid)
+            del self.values[iid]
+        self.calls.append('delete')
+
+    def move(self, iid, parent, index):
+        self.rows.remove(iid)
+        self.rows.insert(index, iid)
+        self.calls.append('move')
+
+    def item(self, iid, values):
+        self.values[iid] = values
+        self.calls.append('item')
+
+
+def record(item_id, quantity=5):
+    return (quantity, item_id * 2, item_id, f'کالا {item_id}', item_id)
+
+
+def make_rows(tree, page_size=10):
+    return TreeRows(tree, lambda r: (r[4], (r[0], r[1], r[2], r[3], 'حذف')), page_size)
+
+
+def test_only_a_page_is_materialized_and_more_come_on_scroll():
+    tree = RecordingTree()
+    rows = make_rows(tree)
+    rows.show(record(i) for i in range(1000))
+    assert tree.rows == [str(i) for i in range(10)]
+    rows.on_scroll('0.0', '0.5')
+    assert len(tree.rows) == 10
+    rows.on_scroll('0.5', '1.0')
+    assert tree.rows == [str(i) for i in range(20)]
+
+
+def test_show_only_touches_changed_rows():
+    tree = RecordingTree()
+    rows = make_rows(tree)
+    rows.show([record(i) for i in range(10)])
+    tree.calls.clear()
+    rows.show([record(i, quantity=7 if i == 3 else 5) for i in range(10) if i != 5] + [record(42)])
+    assert sorted(tree.calls) == ['delete', 'insert', 'item']
+    assert tree.rows == [str(i) for i in range(10) if i != 5] + ['42']
+    assert tree.values['3'][0] == 7
+
+
+def test_random_result_sets_end_up_in_order():
+    rng = random.Random(0)
+    tree = RecordingTree()
+    rows = make_rows(tree, page_size=30)
+    for _ in range(200):
+        ids = rng.sample(range(60), rng.randrange(0, 40))
+        new = [record(i, quantity=rng.randrange(3)) for i in ids]
+        rows.show(new)
+        expected = new[:max(30, len(tree.rows))]
+        assert tree.rows == [str(r[4]) for r in expected]
+        assert [tree.values[str(r[4])][0] for r in expected] == [r[0] for r in expected]
+
+
+def test_reorder_moves_each_row_at_most_once():
+    tree = RecordingTree()
+    rows = make_rows(tree, page_size=300)
+    rows.show([record(i) for i in range(300)])
+    tree.calls.clear()
+    rows.show([record(i) for i in reversed(range(300))])
+    assert tree.rows == [str(i) for i in reversed(range(300))]
+    assert tree.calls.count('move') < 300 and set(tree.calls) == {'move'}
+    # جابه‌جایی یک ردیف به ابتدا فقط یک move است
+    tree.calls.clear()
+    rows.show([record(0)] + [record(i) for i in reversed(range(1, 300))])
+    assert tree.calls == ['move']
+
+
+def test_records_are_fetched_page_by_page():
+    tree = RecordingTree()
+    rows = make_rows(tree)
+    fetched = []
+
+    def fetch(last):
+        # مانند پرس‌وجوی keyset: ۱۰ ردیف بعد از آخرین شناسه
+        fetched.append(last[4])
+        return [record(i) for i in range(last[4] + 1, min(last[4] + 11, 35))]
+
+    rows.show([record(i) for i in range(4)], fetch)
+    assert tree.rows == [str(i) for i in range(10)] and fetched == [3]
+    while rows.more():
+        pass
+    assert tree.rows == [str(i) for i in range(35)]
+    assert fetched == [3, 13, 23, 33, 34] and rows.fetch is None
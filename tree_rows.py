@@ -0,0 +1,79 @@
+from itertools import islice
+
+# Keeps a ttk.Treeview in step with a result set without rebuilding it.
+# show() diffs the new rows against the rows already in the tree and only deletes, moves,
+# updates or inserts the ones that differ. Only the first page (or as many rows as were
+# already materialized) goes into the tree; on_scroll, installed as the tree's
+# yscrollcommand, materializes the next page when the view nears the bottom.
+# The records themselves can be paged too: when they run out, fetch(last record) is asked
+# for the next batch (e.g. a keyset query), until it returns none.
+
+class TreeRows:
+    def __init__(self, tree, row, page_size=200, scrollbar=None):
+        self.tree = tree
+        self.row = row                  # record -> (iid, values)
+        self.page_size = page_size
+        self.scrollbar = scrollbar
+        self.shown = {}                 # {iid: values} of the rows in the tree, in tree order
+        self.rest = iter(())            # records not materialized yet
+        self.fetch = None
+        self.last = None                # last record taken, for fetch()
+
+    def _take(self, count):
+        rows = []
+        while True:
+            for record in islice(self.rest, count - len(rows)):
+                iid, values = self.row(record)
+                rows.append((str(iid), tuple(values)))
+                self.last = record
+            if len(rows) == count or self.fetch is None or self.last is None:
+                return rows
+            records = self.fetch(self.last)
+            if not records:
+                self.fetch = None
+                return rows
+            self.rest = iter(records)
+
+    def show(self, records, fetch=None):
+        self.rest = iter(records)
+        self.fetch = fetch
+        self.last = None
+        new = dict(self._take(max(self.page_size, len(self.shown))))
+        old = self.shown
+        removed = [iid for iid in old if iid not in new]
+        if removed:
+            self.tree.delete(*removed)
+        # The rows before `index` are in place. The row at `index` is either being inserted
+        # or moved there, or it is the next old row (in old order) not yet placed, which
+        # `pending` points at; so every row is visited once and nothing is searched.
+        survivors = [iid for iid in old if iid in new]
+        moved = set()
+        pending = 0
+        for index, (iid, values) in enumerate(new.items()):
+            while pending < len(survivors) and survivors[pending] in moved:
+                pending += 1
+            if iid not in old:
+                self.tree.insert('', index, iid=iid, values=values)
+                continue
+            if pending < len(survivors) and survivors[pending] == iid:
+                pending += 1
+            else:
+                self.tree.move(iid, '', index)
+                moved.add(iid)
+            if old[iid] != values:
+                self.tree.item(iid, values=values)
+        self.shown = new
+
+    def more(self):
+        # Materializes the next page; returns False when every row is in the tree.
+        rows = self._take(self.page_size)
+        for iid, values in rows:
+            self.tree.insert('', 'end', iid=iid, values=values)
+            self.shown[iid] = values
+        return bool(rows)
+
+    def on_scroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if float(last) >= 0.9:
+            self.more()